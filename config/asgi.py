@@ -3,6 +3,25 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production runs here so the async dashboards (student_dash, admin_dashboard,
+view_submissions) don't tie up a worker each, e.g.::
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+Synchronous views keep working, but not in a thread pool: Django runs them
+thread-sensitively (``sync_to_async(thread_sensitive=True)``). A request's
+sync middleware, view and queries all run on one thread, one step at a time,
+and sync code outside a request shares a single thread per process. The
+sync views (login, uploads, grading) still compete for their worker's GIL,
+so size ``-w`` for them as for WSGI, or route them to a WSGI deployment
+(``config.wsgi``) behind the same proxy. Use ``DB_POOL`` rather than
+``DB_CONN_MAX_AGE`` here: request threads aren't reused, so neither are
+persistent connections.
+
+Streamed responses (media downloads, the submissions ZIP) get asynchronous
+bodies from ``core.streaming``; a synchronous iterator would be read whole
+into memory by the ASGI handler before sending.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -22,12 +22,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-z(vn%ja-gm-u#*!aw0uxwe+khh&vj46w7=fyv=464lhb^3*8@7'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', 'django-insecure-z(vn%ja-gm-u#*!aw0uxwe+khh&vj46w7=fyv=464lhb^3*8@7'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Set DJANGO_DEBUG=1 for local development.
+DEBUG = os.environ.get('DJANGO_DEBUG') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,[::1]').split(',')
 
 
 # Application definition
@@ -43,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware',  # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,10 +60,18 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for core.instrumentation.
+        'BACKEND': 'core.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept per process; under runserver the
+            # cache is reset whenever a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -75,12 +87,55 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgres for multi-worker deployments; SQLite (the default) is
+# tuned for a single node: WAL lets readers run alongside the one writer,
+# `timeout` (sqlite3's busy timeout) waits for the write lock instead of failing
+# with "database is locked", and IMMEDIATE transactions take that lock up front
+# so two writers can't deadlock upgrading from a read. `manage.py
+# loadtest_writes` checks either setup, on a scratch copy of the database,
+# under concurrent attendance and submission writes.
+if os.environ.get('DB_ENGINE', 'sqlite') == 'postgres':
+    # DB_POOL=1 uses psycopg's connection pool (pip install "psycopg[pool]"),
+    # which replaces persistent connections; otherwise each worker keeps its
+    # connection for DB_CONN_MAX_AGE seconds, checked before reuse.
+    _db_pool = os.environ.get('DB_POOL') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'academy'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'CONN_MAX_AGE': 0 if _db_pool else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': not _db_pool,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+                    'timeout': 10,
+                },
+            } if _db_pool else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -101,6 +156,30 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (core.hashers). PASSWORD_HASHER picks the algorithm for
+# new hashes; the others stay listed so existing hashes still verify, and
+# they are upgraded on the user's next login. Measure costs with
+# `manage.py bench_login` before changing them. argon2 needs argon2-cffi.
+PASSWORD_HASHING = {
+    'ALGORITHM': os.environ.get('PASSWORD_HASHER', 'pbkdf2_sha256'),
+    'PBKDF2_ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', 1_000_000)),
+    'SCRYPT_WORK_FACTOR': int(os.environ.get('SCRYPT_WORK_FACTOR', 2 ** 14)),
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 102400)),
+}
+_HASHERS = {
+    'pbkdf2_sha256': 'core.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'core.hashers.TunedScryptPasswordHasher',
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    _HASHERS[PASSWORD_HASHING['ALGORITHM']],
+    *[path for name, path in _HASHERS.items() if name != PASSWORD_HASHING['ALGORITHM']],
+]
+
+# Enrollment number or username in one query (core.backends).
+AUTHENTICATION_BACKENDS = ['core.backends.EnrollmentBackend']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -131,5 +210,131 @@ AUTH_USER_MODEL = 'core.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Cache for the dashboards and their template fragments (core.cache). Stale
+# entries are orphaned by bumping version counters kept in the cache itself,
+# so a change only reaches the processes that share it. Local memory is per
+# process: fine for runserver, but any deployment with several workers must
+# point CACHE_URL at Redis (redis://host:6379/0); `check --deploy` warns.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_URL'],
+    } if os.environ.get('CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Sessions get their own cache so dashboard invalidation never evicts
+    # them: Redis when shared, else a directory (SESSION_CACHE_DIR, shared by
+    # the workers of one host). Local memory is only a fallback for an
+    # explicit SESSION_BACKEND=cache|cached_db under runserver.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_URL'],
+        'KEY_PREFIX': 'session',
+    } if os.environ.get('CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['SESSION_CACHE_DIR'],
+    } if os.environ.get('SESSION_CACHE_DIR') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+}
+
+# Sessions: with a shared 'sessions' cache, cached_db reads from it and only
+# falls back to the database on a miss. Without one the plain db engine is
+# used: a per-process cache would let other workers keep serving a session
+# after a logout or flush in one of them (`check --deploy` warns if that is
+# forced). SESSION_BACKEND=db|cache|cached_db|file|signed_cookies picks the
+# engine. Messages live in a signed cookie and never touch the session.
+# Expired rows are removed by `manage.py sweep_sessions`.
+_shared_sessions = bool(os.environ.get('CACHE_URL') or os.environ.get('SESSION_CACHE_DIR'))
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get(
+    'SESSION_BACKEND', 'cached_db' if _shared_sessions else 'db')
+SESSION_CACHE_ALIAS = 'sessions'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Uploaded media are served by core.views.serve_media. OFFLOAD hands the
+# transfer to the front-end server: 'sendfile' (X-Sendfile) or 'accel'
+# (nginx X-Accel-Redirect to an `internal` location at ACCEL_PREFIX).
+MEDIA_SERVING = {
+    'OFFLOAD': os.environ.get('MEDIA_OFFLOAD') or None,
+    'ACCEL_PREFIX': '/protected-media/',
+    'CHUNK_SIZE': 64 * 1024,
+    'MAX_AGE': 3600,
+}
+
+# Chunked, resumable uploads (core.uploads). CHUNK_SIZE must stay below
+# DATA_UPLOAD_MAX_MEMORY_SIZE (2.5 MB by default) as each chunk is one body.
+UPLOADS = {
+    'CHUNK_SIZE': 1024 * 1024,
+    'MAX_SIZE': {
+        'submission': int(os.environ.get('UPLOAD_MAX_SUBMISSION_MB', 50)) * 1024 * 1024,
+        'material': int(os.environ.get('UPLOAD_MAX_MATERIAL_MB', 500)) * 1024 * 1024,
+    },
+    'DIRECTORIES': {'submission': 'submissions', 'material': 'materials/pdfs'},
+    'PARTS_DIR': 'upload_parts',
+    'TTL': 24 * 60 * 60,
+}
+
+# Performance bands from marks (core.performance): (minimum marks, band),
+# best first. Add 'CE' or 'CE:3' keys to override a branch or one cohort,
+# then run `manage.py recompute_performance`.
+PERFORMANCE_BANDS = {
+    'default': [(80, 'Excellent'), (60, 'Good'), (40, 'Average')],
+}
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'student_dash'
+
+# Face identification index (see core.face_index). 'brute' is exact; 'ivf'
+# partitions each branch/semester cohort into k-means buckets.
+FACE_INDEX = {
+    'BACKEND': os.environ.get('FACE_INDEX_BACKEND', 'brute'),
+    'OPTIONS': {},
+    'PATH': os.path.join(MEDIA_ROOT, 'face_index', 'gallery.npz'),
+}
+
+# Browser frame-upload biometrics (see core.biometrics).
+BIOMETRICS = {
+    # Job queue (core.biometric_jobs, run with `manage.py biometric_worker`).
+    # WORKERS=None sizes the process pool to the CPU count; INLINE_JOBS scores
+    # bursts in the request itself, for development without a worker.
+    'WORKERS': int(os.environ['BIOMETRIC_WORKERS']) if os.environ.get('BIOMETRIC_WORKERS') else None,
+    'QUEUE_DEPTH': 256,
+    'INLINE_JOBS': os.environ.get('BIOMETRIC_INLINE_JOBS') == '1',
+    # OpenCV/dlib load on the first burst a process scores. WARM_UP loads
+    # them at startup instead, for processes that score inline; the worker
+    # pool always warms up.
+    'WARM_UP': os.environ.get('BIOMETRIC_WARM_UP') == '1',
+    'JOB_TTL': 600,
+    'POLL_INTERVAL': 0.2,
+    # Seconds the capture page waits for a queued burst before giving up
+    # (e.g. no biometric_worker running).
+    'CLIENT_POLL_TIMEOUT': 30,
+    'MAX_FRAMES': 8,
+    'MAX_FRAME_BYTES': 512 * 1024,
+    'TOLERANCE': 0.5,
+    # Detection pipeline (core.face_pipeline)
+    'DETECT_SCALE': 0.5,
+    'DETECT_EVERY': 2,
+    'MIN_FACE_SIZE': 80,
+    'STABLE_IOU': 0.6,
+    'STABLE_FRAMES': 2,
+    'MAX_ENCODINGS': 2,
+    'DETECTION_MODEL': 'hog',
+}
+
+# Request timings and sampled profiles (see core.instrumentation). Percentiles
+# are per worker process, at /system-admin/metrics/ for staff and /metrics in
+# the Prometheus text format (staff, or "Authorization: Bearer $METRICS_TOKEN").
+INSTRUMENTATION = {
+    'ENABLED': os.environ.get('INSTRUMENTATION', '1') == '1',
+    'WINDOW': 1024,
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+    # e.g. PROFILE_SAMPLE_RATE=0.01 profiles 1% of requests and keeps the
+    # cProfile dumps (snakeviz / pstats) of those slower than PROFILE_SLOW_MS.
+    'PROFILE_SAMPLE_RATE': float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+    'PROFILE_SLOW_MS': int(os.environ.get('PROFILE_SLOW_MS', '500')),
+    'PROFILE_DIR': os.path.join(BASE_DIR, 'profiles'),
+    'PROFILER': os.environ.get('PROFILER', 'cprofile'),
+}
@@ -15,9 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core import views as core_views
 
 urlpatterns = [
     # 1. Django Admin Panel
@@ -25,8 +26,7 @@ urlpatterns = [
 
     # 2. Link to your 'core' app's URLs
     path('', include('core.urls')), 
-]
 
-# 3. Serve Media Files (PDFs, Face ID images) during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # 3. Media Files (PDFs, submissions): permission-checked, streamed with Range support
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<name>.+)$', core_views.serve_media, name='media'),
+]
@@ -1,17 +1,15 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User, Material, StudentData, AssignmentSubmission, LiveSession
+from .promotion import cohort, promote
 
 # --- 1. Bulk Action: Promote Students to Next Semester ---
 @admin.action(description='Promote selected students to next semester')
 def promote_students(modeladmin, request, queryset):
-    updated = 0
-    for user in queryset:
-        if user.is_student and user.semester < 8:
-            user.semester += 1
-            user.save()
-            updated += 1
-    modeladmin.message_user(request, f"Successfully promoted {updated} students.")
+    promoted, graduated = promote(cohort(queryset=queryset))
+    modeladmin.message_user(
+        request, f"Successfully promoted {promoted} students and graduated {graduated}."
+    )
 
 # --- 2. Custom User Admin ---
 class CustomUserAdmin(UserAdmin):
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import biometrics, checks, instrumentation, signals  # noqa: F401
+
+        if instrumentation.get_config()['ENABLED']:
+            connection_created.connect(instrumentation.install_db_wrapper)
+
+        if biometrics.get_config()['WARM_UP']:
+            biometrics.warm_up()
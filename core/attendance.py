@@ -0,0 +1,136 @@
+"""
+Attendance ledger.
+
+Every successful class verification appends an ``AttendanceEvent``; nothing
+ever increments ``StudentData.attendance`` in Python. ``rollup()`` folds the
+events that have not been counted yet into that column with ``F()`` updates
+and flags them, inside one transaction, so concurrent verifications can't
+lose increments and a crash can't count an event twice. ``record()`` rolls up
+straight away; ``manage.py rollup_attendance`` sweeps anything left over.
+"""
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+from . import dashboard_stats, fragments, student_portal
+from .models import AttendanceEvent, StudentData
+
+
+# --- 1. Writing ---
+
+def record(student, session=None, distance=None):
+    """Append one attendance event and count it."""
+    return record_many([(student, session, distance)])[0]
+
+
+def record_many(entries):
+    """Append ``(student, session, distance)`` entries with one INSERT, then roll them up."""
+    events = [
+        AttendanceEvent(student=student, session=session, distance=distance)
+        for student, session, distance in entries
+    ]
+    with transaction.atomic():
+        AttendanceEvent.objects.bulk_create(events)
+        rollup(student_ids={event.student_id for event in events})
+    return events
+
+
+def rollup(student_ids=None):
+    """
+    Add uncounted events to ``StudentData.attendance``; returns how many
+    events were counted. ``student_ids`` limits the sweep to those students.
+    """
+    with transaction.atomic():
+        pending = AttendanceEvent.objects.filter(rolled_up=False)
+        if student_ids is not None:
+            pending = pending.filter(student_id__in=student_ids)
+        if connection.features.has_select_for_update:
+            pending = pending.select_for_update()
+        event_ids = list(pending.values_list('id', flat=True))
+        if not event_ids:
+            return 0
+        counts = dict(
+            AttendanceEvent.objects.filter(id__in=event_ids)
+            .values_list('student_id').annotate(n=Count('id')).order_by()
+        )
+
+        # Lock the profiles so the dashboard buckets below match what we write.
+        profiles = StudentData.objects.filter(student_id__in=counts)
+        if connection.features.has_select_for_update:
+            profiles = profiles.select_for_update()
+        before, after = Counter(), Counter()
+        by_count = defaultdict(list)
+        for student_id, attendance in profiles.values_list('student_id', 'attendance'):
+            before[f'attendance:{dashboard_stats.attendance_bucket(attendance)}'] += 1
+            after[f'attendance:{dashboard_stats.attendance_bucket(attendance + counts[student_id])}'] += 1
+            by_count[counts[student_id]].append(student_id)
+
+        # One UPDATE per distinct increment rather than one per student.
+        for increment, students in by_count.items():
+            StudentData.objects.filter(student_id__in=students).update(
+                attendance=F('attendance') + increment
+            )
+        AttendanceEvent.objects.filter(id__in=event_ids).update(rolled_up=True)
+        # QuerySet.update() skips the signals that keep these current.
+        dashboard_stats.apply(before, after)
+        transaction.on_commit(lambda: student_portal.invalidate_profile(*counts))
+        transaction.on_commit(fragments.invalidate_roster)
+    return len(event_ids)
+
+
+# --- 2. Reports ---
+
+def with_attended(sessions):
+    """Annotate ``attended``: distinct students seen in each session, in the one query."""
+    return sessions.annotate(attended=Count('attendance_events__student', distinct=True))
+
+
+def session_row(session, attended, enrolled):
+    return {
+        'session': session,
+        'attended': attended,
+        'enrolled': enrolled,
+        'percentage': round(100 * attended / enrolled, 1) if enrolled else 0.0,
+    }
+
+
+def session_report(session, enrolled=None):
+    """Distinct attendees of ``session`` against ``enrolled`` (default: active students)."""
+    attended = (
+        AttendanceEvent.objects.filter(session=session)
+        .values('student').distinct().count()
+    )
+    if enrolled is None:
+        enrolled = StudentData.objects.filter(is_active=True).count()
+    return session_row(session, attended, enrolled)
+
+
+def student_report(student):
+    """
+    Per live session: the days ``student`` attended out of the days the
+    session ran (any verified attendance that day).
+    """
+    attended = list(
+        AttendanceEvent.objects.filter(student=student, session__isnull=False)
+        .annotate(day=TruncDate('recorded_at'))
+        .values_list('session', 'session__title').annotate(days=Count('day', distinct=True))
+        .order_by('session')
+    )
+    held = dict(
+        AttendanceEvent.objects.filter(session__in=[row[0] for row in attended])
+        .annotate(day=TruncDate('recorded_at'))
+        .values_list('session').annotate(days=Count('day', distinct=True))
+        .order_by()
+    )
+    return [
+        {
+            'session_id': session_id,
+            'title': title,
+            'attended': days,
+            'held': held.get(session_id, days),
+            'percentage': round(100 * days / held.get(session_id, days), 1),
+        }
+        for session_id, title, days in attended
+    ]
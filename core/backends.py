@@ -0,0 +1,27 @@
+"""
+Authentication backend for the login page.
+
+Students sign in with their enrollment number, staff with their username.
+Either resolves to the user with one query on a unique index, instead of
+looking the student up and then letting ModelBackend fetch them again by
+username. Hashes made with an older algorithm or cost (see ``core.hashers``)
+are upgraded by ``check_password`` on the next successful login.
+"""
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+
+
+class EnrollmentBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, enrollment=None, **kwargs):
+        if password is None or not (enrollment or username):
+            return None
+        lookup = {'enrollment_number': enrollment} if enrollment else {User.USERNAME_FIELD: username}
+        user = User._default_manager.filter(**lookup).first()
+        if user is None:
+            # Hash anyway so unknown accounts take as long as wrong passwords.
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,194 @@
+"""
+Local job queue for biometric work.
+
+Views store each uploaded burst as a ``BiometricJob`` row and return
+immediately. ``manage.py biometric_worker`` claims pending rows and scores
+them in a ``ProcessPoolExecutor`` whose processes load the face models once
+at start-up, so detection and encoding scale with cores instead of sharing
+the GIL of a Django worker. The database is the only broker.
+
+A finished job holds a JSON result; the view that polls it applies the
+decision (login, enrolment, attendance) exactly once.
+
+A claim is a lease (``claimed_at``): a job still RUNNING a ``JOB_TTL`` after
+it was claimed lost its worker (killed, out of memory) and is failed by
+``purge``. Jobs past the TTL no longer count toward ``QUEUE_DEPTH``, so a
+dead worker can't leave the queue looking full.
+"""
+import base64
+import logging
+import multiprocessing
+import struct
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import biometrics, face_codec
+from .models import BiometricJob
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct('<I')
+
+
+# --- 1. Payload packing ---
+
+def pack_frames(frames):
+    """Length-prefix each frame so a burst fits in one BinaryField."""
+    return b''.join(_LENGTH.pack(len(data)) + data for data in frames)
+
+
+def unpack_frames(blob):
+    view, frames, offset = memoryview(blob), [], 0
+    while offset < len(view):
+        (size,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        frames.append(bytes(view[offset:offset + size]))
+        offset += size
+    return frames
+
+
+# --- 2. Submission (web process) ---
+
+def submit(kind, frames, request, reference=None, group=''):
+    """Queue a burst for scoring; raises BiometricsBusy when the backlog is full."""
+    config = biometrics.get_config()
+    cutoff = timezone.now() - timedelta(seconds=config['JOB_TTL'])
+    backlog = BiometricJob.objects.filter(
+        Q(status=BiometricJob.PENDING, created_at__gte=cutoff)
+        | Q(status=BiometricJob.RUNNING, claimed_at__gte=cutoff)
+    ).count()
+    if backlog >= config['QUEUE_DEPTH']:
+        raise biometrics.BiometricsBusy()
+
+    if not request.session.session_key:
+        request.session.save()
+    job = BiometricJob.objects.create(
+        kind=kind,
+        user=request.user if request.user.is_authenticated else None,
+        session_key=request.session.session_key,
+        frames=pack_frames(frames),
+        reference=reference,
+        group=group or '',
+    )
+    if config['INLINE_JOBS']:
+        _store_outcome(job.pk, *_run_safely(job.kind, job.frames, job.reference, job.group))
+        job.refresh_from_db()
+    return job
+
+
+def mark_applied(job):
+    """Atomically move a finished job to APPLIED; False if someone beat us to it."""
+    return BiometricJob.objects.filter(
+        pk=job.pk, status=BiometricJob.DONE
+    ).update(status=BiometricJob.APPLIED) == 1
+
+
+# --- 3. Execution (worker processes, see core.worker_bootstrap) ---
+
+def run_job(kind, frames, reference, group):
+    """Score one job; runs in a worker process and returns a JSON-able dict."""
+    frames = unpack_frames(frames)
+    if kind == BiometricJob.IDENTIFY:
+        match, scan = biometrics.identify(frames, group=group or None)
+        result = {
+            'success': match is not None,
+            'student_id': match[0] if match else None,
+            'distance': match[1] if match else None,
+        }
+    elif kind == BiometricJob.VERIFY:
+        distance, scan = biometrics.verify(frames, face_codec.decode(reference))
+        result = {'success': distance is not None, 'distance': distance}
+    elif kind == BiometricJob.ENROLL:
+        encoding, scan = biometrics.enroll(frames)
+        result = {
+            'success': encoding is not None,
+            'encoding': (
+                base64.b64encode(face_codec.encode(encoding)).decode('ascii')
+                if encoding is not None else None
+            ),
+        }
+    else:
+        raise ValueError(f"Unknown biometric job kind {kind!r}.")
+    result['timings'] = scan.timings_ms()
+    return result
+
+
+def _run_safely(kind, frames, reference, group):
+    try:
+        return run_job(kind, bytes(frames), reference and bytes(reference), group), None
+    except Exception as exc:
+        logger.exception("Biometric job failed")
+        return None, exc
+
+
+def result_encoding(job):
+    """Decode the encoding returned by an enroll job."""
+    return base64.b64decode(job.result['encoding'])
+
+
+# --- 4. Worker loop helpers ---
+
+def claim(limit):
+    """Claim up to ``limit`` pending jobs (oldest first) for this worker."""
+    if limit <= 0:
+        return []
+    with transaction.atomic():
+        pending = BiometricJob.objects.filter(status=BiometricJob.PENDING).order_by('created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        jobs = list(pending.only('kind', 'frames', 'reference', 'group')[:limit])
+        BiometricJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=BiometricJob.RUNNING, claimed_at=timezone.now()
+        )
+    return jobs
+
+
+def release(job_ids):
+    """Put claimed jobs that never reached the pool back in the queue."""
+    return BiometricJob.objects.filter(pk__in=job_ids, status=BiometricJob.RUNNING).update(
+        status=BiometricJob.PENDING, claimed_at=None
+    )
+
+
+def _store_outcome(job_id, result, exc):
+    update = {'finished_at': timezone.now(), 'frames': b''}
+    if exc is None:
+        update.update(status=BiometricJob.DONE, result=result)
+    else:
+        update.update(status=BiometricJob.FAILED, error=str(exc) or exc.__class__.__name__)
+    BiometricJob.objects.filter(pk=job_id).update(**update)
+
+
+def finish(job_id, future):
+    """Record the outcome of a completed pool future."""
+    try:
+        _store_outcome(job_id, future.result(), None)
+    except Exception as exc:
+        logger.error("Biometric job %s failed: %s", job_id, exc)
+        _store_outcome(job_id, None, exc)
+
+
+def purge(ttl=None):
+    """
+    Fail RUNNING jobs whose lease outlived the TTL, then delete jobs finished
+    more than a TTL ago and PENDING ones nobody has been polling for since.
+    Returns the number of rows deleted.
+    """
+    ttl = ttl if ttl is not None else biometrics.get_config()['JOB_TTL']
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=ttl)
+    BiometricJob.objects.filter(status=BiometricJob.RUNNING, claimed_at__lt=cutoff).update(
+        status=BiometricJob.FAILED, error="The biometric worker stopped before finishing this job.",
+        finished_at=now, frames=b'',
+    )
+    return BiometricJob.objects.filter(
+        Q(status=BiometricJob.PENDING, created_at__lt=cutoff)
+        | Q(status__in=[BiometricJob.DONE, BiometricJob.FAILED, BiometricJob.APPLIED], finished_at__lt=cutoff)
+    ).delete()[0]
+
+
+def default_workers():
+    return biometrics.get_config()['WORKERS'] or multiprocessing.cpu_count()
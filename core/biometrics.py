@@ -0,0 +1,103 @@
+"""
+Frame-based biometric processing for the face views.
+
+The browser captures a short burst of JPEG frames and posts them. The
+functions here decode a burst, run it through the detection pipeline and
+turn the encodings into a decision. They are CPU-bound and are normally run
+inside the biometric worker processes (see ``core.biometric_jobs``), not in
+the Django request thread. Nothing here touches the server's own camera.
+
+This module stays light so every process can import it: the OpenCV/dlib
+work lives in ``core.face_engine``, imported on first use (``engine()``) or
+ahead of time by ``warm_up()``.
+"""
+from django.conf import settings
+
+DEFAULTS = {
+    'WORKERS': None,
+    'QUEUE_DEPTH': 256,
+    'INLINE_JOBS': False,
+    'WARM_UP': False,
+    'JOB_TTL': 600,
+    'POLL_INTERVAL': 0.2,
+    'CLIENT_POLL_TIMEOUT': 30,
+    'MAX_FRAMES': 8,
+    'MAX_FRAME_BYTES': 512 * 1024,
+    'TOLERANCE': 0.5,
+    'DETECT_SCALE': 0.5,
+    'DETECT_EVERY': 2,
+    'MIN_FACE_SIZE': 80,
+    'STABLE_IOU': 0.6,
+    'STABLE_FRAMES': 2,
+    'MAX_ENCODINGS': 2,
+    'DETECTION_MODEL': 'hog',
+}
+
+IMAGE_SIGNATURES = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n')  # JPEG, PNG
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'BIOMETRICS', {})}
+
+
+class BiometricsBusy(Exception):
+    """Raised when the job queue already has a full backlog."""
+
+
+class InvalidFrames(ValueError):
+    """Raised when the uploaded burst is missing, too large or undecodable."""
+
+
+# --- 1. Loading the engine ---
+
+def engine():
+    """``core.face_engine``, imported the first time a burst is scored."""
+    from . import face_engine
+    return face_engine
+
+
+def warm_up():
+    """Load the engine and its models now; for dedicated biometric workers."""
+    engine().warm_up()
+
+
+# --- 2. Request helpers ---
+
+def read_frames(request):
+    """Validate and return the raw bytes of the ``frames`` uploads."""
+    config = get_config()
+    uploads = request.FILES.getlist('frames')
+    if not uploads:
+        raise InvalidFrames("No frames were uploaded.")
+    if len(uploads) > config['MAX_FRAMES']:
+        raise InvalidFrames(f"At most {config['MAX_FRAMES']} frames per request.")
+    frames = []
+    for upload in uploads:
+        if upload.size > config['MAX_FRAME_BYTES']:
+            raise InvalidFrames("Frame is too large.")
+        data = upload.read()
+        if not data:
+            raise InvalidFrames("Frame is empty.")
+        # Full decoding happens in the worker; reject what can't be an image up front.
+        if not data.startswith(IMAGE_SIGNATURES):
+            raise InvalidFrames("Frames must be JPEG or PNG images.")
+        frames.append(data)
+    return frames
+
+
+# --- 3. Decisions ---
+# Each returns (decision, PipelineResult) so callers can report stage timings.
+
+def identify(frames, group=None):
+    """1:N match; the decision is (student_id, distance) or None."""
+    return engine().identify(frames, group=group)
+
+
+def verify(frames, reference):
+    """1:1 match against a stored encoding; the decision is the best distance or None."""
+    return engine().verify(frames, reference)
+
+
+def enroll(frames):
+    """The decision is the encoding of the first stable face in the burst, or None."""
+    return engine().enroll(frames)
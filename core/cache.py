@@ -0,0 +1,70 @@
+"""
+Small helpers around Django's cache for the student-facing pages.
+
+Cached values that depend on many rows (the material list of a cohort) are
+stored under a *versioned* key: invalidating means bumping the namespace's
+version counter, which orphans every old entry at once without having to
+know their keys. Versions start from the current time in milliseconds so a
+counter that was evicted can never fall back onto stale entries.
+
+The counters live in the cache next to the entries, so a bump is only seen
+by processes sharing that cache. With the per-process local-memory backend
+the other workers keep their old copies until the timeout; multi-process
+deployments need a shared backend (see ``settings.CACHES``, ``core.checks``).
+"""
+import time
+
+from django.core.cache import cache
+
+DEFAULT_TIMEOUT = 300
+_MISSING = object()
+
+
+def get_version(namespace):
+    return cache.get_or_set(f'version:{namespace}', lambda: int(time.time() * 1000), None)
+
+
+def bump_version(namespace):
+    """Invalidate every entry stored under ``namespace``."""
+    key = f'version:{namespace}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def versioned_key(*namespaces, suffix=''):
+    """A key that changes whenever any of ``namespaces`` is bumped."""
+    versions = [get_version(namespace) for namespace in namespaces]
+    return ':'.join([*namespaces, *map(str, versions), suffix])
+
+
+async def aget_version(namespace):
+    return await cache.aget_or_set(f'version:{namespace}', lambda: int(time.time() * 1000), None)
+
+
+async def aversioned_key(*namespaces, suffix=''):
+    versions = [await aget_version(namespace) for namespace in namespaces]
+    return ':'.join([*namespaces, *map(str, versions), suffix])
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT):
+    """Return the cached value for ``key``, computing and storing it on a miss."""
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_compute(key, acompute, timeout=DEFAULT_TIMEOUT):
+    """``get_or_compute()`` for async views; ``acompute`` is a coroutine function."""
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        value = await acompute()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+def delete(*keys):
+    cache.delete_many(keys)
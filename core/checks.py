@@ -0,0 +1,36 @@
+"""
+System checks for settings that only hold up in some deployments.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Versioned cache keys (core.cache) only reach the processes sharing the cache."""
+    if settings.CACHES.get('default', {}).get('BACKEND') != LOCMEM:
+        return []
+    return [Warning(
+        "The default cache is local to each process.",
+        hint="Cached dashboards and template fragments are versioned in the cache, so a change made "
+             "in one worker leaves the others serving their old copies until they expire. Set "
+             "CACHE_URL to a shared Redis, or run a single process.",
+        id='core.W001',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_session_cache(app_configs, **kwargs):
+    """Cached sessions must be readable by every worker, or a logout only reaches one."""
+    engine = settings.SESSION_ENGINE.rsplit('.', 1)[-1]
+    alias = getattr(settings, 'SESSION_CACHE_ALIAS', 'default')
+    if engine not in ('cache', 'cached_db') or settings.CACHES.get(alias, {}).get('BACKEND') != LOCMEM:
+        return []
+    return [Warning(
+        f"Sessions are cached in the process-local '{alias}' cache.",
+        hint="A logout or session flush in one worker leaves the others serving the old session. "
+             "Set CACHE_URL or SESSION_CACHE_DIR, or use SESSION_BACKEND=db.",
+        id='core.W002',
+    )]
@@ -0,0 +1,151 @@
+"""
+Precomputed counters for the admin dashboard.
+
+Every statistic on the dashboard is a row in ``DashboardStat``, so the page
+reads them all with one query however large the college gets. The signals in
+``core.signals`` work out what each saved or deleted row contributes before
+and after the change and apply the difference with ``F()`` updates. Bulk
+paths that bypass signals (promotion, student import) call ``rebuild()``.
+
+Keys:
+    students, faces, active_sessions
+    cohort:<branch>:<semester>   students per branch/semester
+    band:<performance>           Excellent / Good / Average / Poor / Pending
+    attendance:<n>               students with attendance in [10n, 10n + 10)
+"""
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, IntegerField, Q
+from django.db.models.functions import Cast, Floor, Least
+
+from . import performance
+from .models import DashboardStat, LiveSession, StudentData, User
+
+ATTENDANCE_BUCKETS = 11  # 0-9 ... 90-99, then 100 and above
+
+
+def attendance_bucket(attendance):
+    return min(max(int(attendance or 0) // 10, 0), ATTENDANCE_BUCKETS - 1)
+
+
+# --- 1. Per-row contributions ---
+
+def student_contribution(performance, attendance, has_face):
+    keys = Counter({'students': 1, f'band:{performance}': 1,
+                    f'attendance:{attendance_bucket(attendance)}': 1})
+    if has_face:
+        keys['faces'] = 1
+    return keys
+
+
+def user_contribution(is_student, branch, semester):
+    if is_student and branch:
+        return Counter({f'cohort:{branch}:{semester}': 1})
+    return Counter()
+
+
+def session_contribution(is_active):
+    return Counter({'active_sessions': 1}) if is_active else Counter()
+
+
+def stored_student(pk):
+    """Contribution of the StudentData row as it is in the database now."""
+    row = (
+        StudentData.objects.filter(pk=pk)
+        .annotate(has_face=ExpressionWrapper(Q(face_encoding__isnull=False), output_field=BooleanField()))
+        .values_list('performance', 'attendance', 'has_face')
+        .first()
+    )
+    return student_contribution(*row) if row else Counter()
+
+
+def stored_user(pk):
+    row = User.objects.filter(pk=pk).values_list('is_student', 'branch', 'semester').first()
+    return user_contribution(*row) if row else Counter()
+
+
+def stored_session(pk):
+    row = LiveSession.objects.filter(pk=pk).values_list('is_active', flat=True).first()
+    return session_contribution(row) if row is not None else Counter()
+
+
+# --- 2. Reading & writing counters ---
+
+def apply(before, after):
+    """Apply the change from contribution ``before`` to ``after``."""
+    deltas = Counter(after)
+    deltas.subtract(before)
+    for key, delta in deltas.items():
+        if delta:
+            if not DashboardStat.objects.filter(key=key).update(value=F('value') + delta):
+                stat, created = DashboardStat.objects.get_or_create(key=key, defaults={'value': delta})
+                if not created:
+                    DashboardStat.objects.filter(pk=stat.pk).update(value=F('value') + delta)
+
+
+def rebuild():
+    """Recompute every counter from scratch with a handful of aggregate queries."""
+    stats = Counter({'students': 0, 'faces': 0, 'active_sessions': 0})
+    stats.update(StudentData.objects.aggregate(
+        students=Count('pk'), faces=Count('pk', filter=Q(face_encoding__isnull=False)),
+    ))
+    stats['active_sessions'] = LiveSession.objects.filter(is_active=True).count()
+    for band, count in StudentData.objects.values_list('performance').annotate(n=Count('pk')):
+        stats[f'band:{band}'] = count
+    buckets = (
+        StudentData.objects
+        .annotate(bucket=Least(Cast(Floor(F('attendance') / 10), IntegerField()), ATTENDANCE_BUCKETS - 1))
+        .values_list('bucket').annotate(n=Count('pk'))
+    )
+    for bucket, count in buckets:
+        stats[f'attendance:{max(int(bucket), 0)}'] += count
+    cohorts = (
+        User.objects.filter(is_student=True, branch__isnull=False)
+        .values_list('branch', 'semester').annotate(n=Count('pk'))
+    )
+    for branch, semester, count in cohorts:
+        stats[f'cohort:{branch}:{semester}'] = count
+
+    with transaction.atomic():
+        DashboardStat.objects.all().delete()
+        DashboardStat.objects.bulk_create(
+            [DashboardStat(key=key, value=value) for key, value in stats.items()]
+        )
+    return dict(stats)
+
+
+def snapshot():
+    """All counters in one query, rebuilding them the first time round."""
+    stats = dict(DashboardStat.objects.values_list('key', 'value'))
+    return stats or rebuild()
+
+
+async def asnapshot():
+    stats = {key: value async for key, value in DashboardStat.objects.values_list('key', 'value')}
+    return stats or await sync_to_async(rebuild)()
+
+
+def summary(stats=None):
+    """Counters shaped for ``admin_dash.html``."""
+    stats = snapshot() if stats is None else stats
+    return {
+        'total_students': stats.get('students', 0),
+        'registered_faces': stats.get('faces', 0),
+        'active_sessions': stats.get('active_sessions', 0),
+        'cohorts': [
+            (label, semester, stats.get(f'cohort:{code}:{semester}', 0))
+            for code, label in User.BRANCH_CHOICES for semester, _ in User.SEM_CHOICES
+        ],
+        'bands': [(band, stats.get(f'band:{band}', 0)) for band in performance.band_names()],
+        'attendance_histogram': [
+            (f'{n * 10}+' if n == ATTENDANCE_BUCKETS - 1 else f'{n * 10}-{n * 10 + 9}',
+             stats.get(f'attendance:{n}', 0))
+            for n in range(ATTENDANCE_BUCKETS)
+        ],
+    }
+
+
+async def asummary():
+    return summary(await asnapshot())
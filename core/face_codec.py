@@ -0,0 +1,73 @@
+"""
+Fixed-layout binary storage for ``StudentData.face_encoding``.
+
+Layout (little-endian)::
+
+    offset  size  field
+    0       2     magic  b'FE'
+    2       1     format version (1)
+    3       1     dtype code (1 = float32)
+    4       2     dimension (128 for dlib encodings)
+    6       2     reserved, zero
+    8       4*d   encoding as raw float32
+
+The 8-byte header keeps the payload 4-byte aligned, so readers can wrap a
+stored value with ``np.frombuffer`` without copying, and a whole gallery of
+same-sized records can be viewed as one matrix.
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b'FE'
+VERSION = 1
+DTYPE_FLOAT32 = 1
+DIMENSION = 128
+
+HEADER = struct.Struct('<2sBBHH')
+PAYLOAD_DTYPE = np.dtype('<f4')
+RECORD_SIZE = HEADER.size + DIMENSION * PAYLOAD_DTYPE.itemsize
+
+_HEADER_BYTES = HEADER.pack(MAGIC, VERSION, DTYPE_FLOAT32, DIMENSION, 0)
+
+
+def encode(encoding):
+    """Serialise a face encoding (any float array of length 128) to bytes."""
+    vector = np.asarray(encoding, dtype=PAYLOAD_DTYPE).reshape(-1)
+    if vector.shape[0] != DIMENSION:
+        raise ValueError(f"Expected a {DIMENSION}-d encoding, got {vector.shape[0]}.")
+    return _HEADER_BYTES + vector.tobytes()
+
+
+def decode(blob):
+    """Return a read-only float32 view over a stored encoding (no copy)."""
+    buffer = memoryview(blob)
+    if len(buffer) < HEADER.size:
+        raise ValueError("Face encoding is too short to contain a header.")
+    magic, version, dtype_code, dimension, _ = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION or dtype_code != DTYPE_FLOAT32:
+        raise ValueError("Unsupported face encoding format.")
+    if len(buffer) != HEADER.size + dimension * PAYLOAD_DTYPE.itemsize:
+        raise ValueError("Face encoding length does not match its header.")
+    return np.frombuffer(buffer, dtype=PAYLOAD_DTYPE, count=dimension, offset=HEADER.size)
+
+
+def decode_many(blobs):
+    """
+    Decode a sequence of stored encodings into an ``(n, 128)`` float32 matrix.
+
+    The records are concatenated into a single buffer and viewed through a
+    structured dtype, so the only copy is the join itself.
+    """
+    if not blobs:
+        return np.empty((0, DIMENSION), dtype=PAYLOAD_DTYPE)
+    buffer = b''.join(bytes(blob) for blob in blobs)
+    if len(buffer) != len(blobs) * RECORD_SIZE:
+        raise ValueError("Face encodings are not all in the current format.")
+    records = np.frombuffer(buffer, dtype=np.dtype([
+        ('header', 'V%d' % HEADER.size),
+        ('vector', PAYLOAD_DTYPE, (DIMENSION,)),
+    ]))
+    if (records['header'] != np.void(_HEADER_BYTES)).any():
+        raise ValueError("Unsupported face encoding format.")
+    return records['vector']
@@ -0,0 +1,82 @@
+"""
+The heavy half of ``core.biometrics``: frame decoding and face matching.
+
+Importing this module loads OpenCV and face_recognition (and with it dlib
+and its models, hundreds of MB), so nothing imports it at startup; it is
+loaded by ``biometrics.engine()`` on the first burst a process scores, or
+up front by ``biometrics.warm_up()`` in the dedicated biometric workers.
+"""
+import logging
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+from .biometrics import InvalidFrames, get_config
+from .face_pipeline import DetectionPipeline, PipelineConfig
+from .gallery import face_gallery
+
+logger = logging.getLogger('core.biometrics')
+
+
+# --- 1. Frame decoding & encoding ---
+
+def decode_frame(data):
+    """Decode JPEG/PNG bytes into an RGB ndarray."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise InvalidFrames("Frame could not be decoded.")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def run_pipeline(frames, max_encodings=None):
+    """
+    Push a burst through the detection pipeline and return its
+    ``PipelineResult`` (encodings plus per-stage timings).
+    """
+    config = PipelineConfig.from_settings(get_config())
+    if max_encodings is not None:
+        config.max_encodings = max_encodings
+    pipeline = DetectionPipeline(config)
+    for data in frames:
+        with pipeline.stage('decode'):
+            rgb_frame = decode_frame(data)
+        pipeline.process(rgb_frame)
+        if pipeline.done:
+            break
+    logger.debug("Biometric burst: %d frames, %d detections, timings %s",
+                 pipeline.result.frames, pipeline.result.detections, pipeline.result.timings_ms())
+    return pipeline.result
+
+
+def warm_up():
+    """Run the detector and encoder once so the first real burst isn't slow."""
+    blank = np.zeros((160, 160, 3), dtype=np.uint8)
+    face_recognition.face_encodings(blank, face_recognition.face_locations(blank))
+
+
+# --- 2. Decisions ---
+
+def identify(frames, group=None):
+    result = run_pipeline(frames)
+    started = time.perf_counter()
+    match = face_gallery.match(result.encodings, tolerance=get_config()['TOLERANCE'], group=group)
+    result.timings['match'] += time.perf_counter() - started
+    return match, result
+
+
+def verify(frames, reference):
+    result = run_pipeline(frames)
+    if not result.encodings:
+        return None, result
+    started = time.perf_counter()
+    distances = face_recognition.face_distance(np.asarray(result.encodings), reference)
+    best = float(np.min(distances))
+    result.timings['match'] += time.perf_counter() - started
+    return (best if best <= get_config()['TOLERANCE'] else None), result
+
+
+def enroll(frames):
+    result = run_pipeline(frames, max_encodings=1)
+    return (result.encodings[0] if result.encodings else None), result
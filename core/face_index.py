@@ -0,0 +1,373 @@
+"""
+Identification indexes for 1:N face matching.
+
+Both backends expose the same small API::
+
+    index.build(ids, vectors, groups)
+    index.add(student_id, vector, group)
+    index.remove(student_id)
+    index.query(probes, k=1, group=None)  ->  [[(student_id, distance), ...], ...]
+
+``group`` is the student's cohort key (see ``cohort_key``). When a caller
+knows the cohort, only that partition is searched.
+
+``BruteForceIndex`` scores every row with one matrix product and is exact.
+``IVFIndex`` splits each cohort into k-means buckets and only scans the
+``nprobe`` buckets nearest to the probe, trading a little recall for
+sub-linear query time on large galleries.
+
+Indexes can be written to and read back from a single ``.npz`` file so a
+restarted worker does not have to rebuild from the database. The file keeps
+the index's ``version`` (see ``core.gallery``) so readers can tell whether it
+is current.
+"""
+import os
+import tempfile
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+DIMENSION = 128
+
+
+def cohort_key(branch, semester):
+    """Partition key for a student; unknown branches share the '' bucket."""
+    return f"{branch}:{semester}" if branch else ''
+
+
+def _as_matrix(vectors):
+    return np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, DIMENSION)
+
+
+def _squared_distances(probes, matrix):
+    sq = (
+        np.einsum('ij,ij->i', probes, probes)[:, None]
+        + np.einsum('ij,ij->i', matrix, matrix)[None, :]
+        - 2.0 * probes @ matrix.T
+    )
+    return np.maximum(sq, 0.0)
+
+
+def _top_k(ids, sq_distances, k):
+    """Per-row (id, distance) lists for the k smallest entries of each row."""
+    k = min(k, sq_distances.shape[1])
+    if k == 0:
+        return [[] for _ in range(sq_distances.shape[0])]
+    part = np.argpartition(sq_distances, k - 1, axis=1)[:, :k]
+    results = []
+    for row, cols in zip(sq_distances, part):
+        cols = cols[np.argsort(row[cols])]
+        results.append([(int(ids[c]), float(np.sqrt(row[c]))) for c in cols])
+    return results
+
+
+class FaceIndex(ABC):
+    """Common persistence helpers; subclasses implement the search API."""
+
+    backend = None
+    version = 0  # gallery version the entries reflect
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+    @abstractmethod
+    def build(self, ids, vectors, groups=None):
+        ...
+
+    @abstractmethod
+    def add(self, student_id, vector, group=''):
+        ...
+
+    @abstractmethod
+    def remove(self, student_id):
+        ...
+
+    @abstractmethod
+    def query(self, probes, k=1, group=None):
+        ...
+
+    @abstractmethod
+    def entries(self):
+        """Return flat ``(ids, matrix, groups)`` arrays for every indexed row."""
+
+    def get(self, student_id):
+        """Return ``(vector, group)`` for an indexed student, or ``None``."""
+        ids, matrix, groups = self.entries()
+        hits = np.flatnonzero(ids == student_id)
+        if not hits.size:
+            return None
+        return matrix[hits[0]], str(groups[hits[0]])
+
+    def _extra_state(self):
+        return {}
+
+    def _restore(self, ids, matrix, groups, state):
+        self.build(ids, matrix, groups)
+
+    def save(self, path):
+        """Atomically write the index to ``path`` (a ``.npz`` file)."""
+        ids, matrix, groups = self.entries()
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                np.savez(
+                    fh, backend=np.array(self.backend), version=np.int64(self.version),
+                    ids=ids, matrix=matrix, groups=groups, **self._extra_state(),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+class BruteForceIndex(FaceIndex):
+    backend = 'brute'
+
+    def __init__(self):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = np.empty((0, DIMENSION), dtype=np.float32)
+        self._groups = np.empty(0, dtype='U16')
+
+    def __len__(self):
+        return len(self._ids)
+
+    def build(self, ids, vectors, groups=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        if groups is None:
+            groups = [''] * len(ids)
+        self._ids, self._matrix = ids, _as_matrix(vectors)
+        self._groups = np.asarray(groups, dtype='U16')
+
+    def add(self, student_id, vector, group=''):
+        vector = _as_matrix(vector)
+        ids, matrix, groups = self._ids, self._matrix, self._groups
+        hits = np.flatnonzero(ids == student_id)
+        if hits.size:
+            matrix, groups = matrix.copy(), groups.copy()
+            matrix[hits[0]], groups[hits[0]] = vector[0], group
+        else:
+            ids = np.append(ids, np.int64(student_id))
+            matrix = np.concatenate([matrix, vector])
+            groups = np.append(groups, np.asarray([group], dtype='U16'))
+        self._ids, self._matrix, self._groups = ids, matrix, groups
+
+    def remove(self, student_id):
+        keep = self._ids != student_id
+        if not keep.all():
+            self._ids, self._matrix, self._groups = (
+                self._ids[keep], self._matrix[keep], self._groups[keep]
+            )
+
+    def query(self, probes, k=1, group=None):
+        probes = _as_matrix(probes)
+        ids, matrix = self._ids, self._matrix
+        if group is not None:
+            mask = self._groups == group
+            ids, matrix = ids[mask], matrix[mask]
+        if not len(ids):
+            return [[] for _ in range(len(probes))]
+        return _top_k(ids, _squared_distances(probes, matrix), k)
+
+    def entries(self):
+        return self._ids, self._matrix, self._groups
+
+
+class _Partition:
+    """One cohort's IVF buckets: centroids plus per-bucket (ids, matrix)."""
+
+    def __init__(self, centroids):
+        self.centroids = centroids
+        self.lists = [
+            (np.empty(0, dtype=np.int64), np.empty((0, DIMENSION), dtype=np.float32))
+            for _ in range(len(centroids))
+        ]
+
+    def nearest_lists(self, probes, nprobe):
+        sq = _squared_distances(probes, self.centroids)
+        nprobe = min(nprobe, len(self.centroids))
+        return np.argpartition(sq, nprobe - 1, axis=1)[:, :nprobe]
+
+    def assign(self, matrix):
+        return np.argmin(_squared_distances(matrix, self.centroids), axis=1)
+
+
+class IVFIndex(FaceIndex):
+    """
+    Inverted-file index: per-cohort k-means buckets, searched ``nprobe`` at a
+    time. Cohorts smaller than ``min_partition_size`` use a single bucket,
+    which is equivalent to an exact scan of that cohort.
+    """
+
+    backend = 'ivf'
+
+    def __init__(self, nlist=None, nprobe=8, min_partition_size=1024, kmeans_iter=10, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_partition_size = min_partition_size
+        self.kmeans_iter = kmeans_iter
+        self.seed = seed
+        self._partitions = {}
+        self._location = {}  # student_id -> (group, list_no)
+
+    def __len__(self):
+        return len(self._location)
+
+    def _nlist_for(self, n):
+        if n < self.min_partition_size:
+            return 1
+        return min(n, self.nlist or max(1, int(np.sqrt(n))))
+
+    def _kmeans(self, matrix, nlist):
+        rng = np.random.default_rng(self.seed)
+        sample = matrix
+        if len(matrix) > nlist * 64:
+            sample = matrix[rng.choice(len(matrix), nlist * 64, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iter):
+            labels = np.argmin(_squared_distances(sample, centroids), axis=1)
+            counts = np.bincount(labels, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        return centroids
+
+    def _fill(self, group, partition, ids, matrix, labels):
+        for list_no in range(len(partition.centroids)):
+            mask = labels == list_no
+            partition.lists[list_no] = (ids[mask], matrix[mask])
+            for student_id in ids[mask]:
+                self._location[int(student_id)] = (group, list_no)
+
+    def build(self, ids, vectors, groups=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        matrix = _as_matrix(vectors)
+        groups = np.asarray([''] * len(ids) if groups is None else groups, dtype='U16')
+        self._partitions, self._location = {}, {}
+        for group in np.unique(groups):
+            mask = groups == group
+            g_ids, g_matrix = ids[mask], matrix[mask]
+            nlist = self._nlist_for(len(g_ids))
+            if nlist == 1:
+                centroids = g_matrix.mean(axis=0, keepdims=True)
+            else:
+                centroids = self._kmeans(g_matrix, nlist)
+            partition = _Partition(centroids.astype(np.float32))
+            self._fill(str(group), partition, g_ids, g_matrix, partition.assign(g_matrix))
+            self._partitions[str(group)] = partition
+
+    def add(self, student_id, vector, group=''):
+        self.remove(student_id)
+        vector = _as_matrix(vector)
+        partition = self._partitions.get(group)
+        if partition is None:
+            partition = self._partitions[group] = _Partition(vector.copy())
+        list_no = int(partition.assign(vector)[0])
+        ids, matrix = partition.lists[list_no]
+        partition.lists[list_no] = (
+            np.append(ids, np.int64(student_id)), np.concatenate([matrix, vector])
+        )
+        self._location[int(student_id)] = (group, list_no)
+
+    def remove(self, student_id):
+        location = self._location.pop(int(student_id), None)
+        if location is None:
+            return
+        group, list_no = location
+        partition = self._partitions[group]
+        ids, matrix = partition.lists[list_no]
+        keep = ids != student_id
+        partition.lists[list_no] = (ids[keep], matrix[keep])
+
+    def query(self, probes, k=1, group=None):
+        probes = _as_matrix(probes)
+        if group is not None:
+            partitions = [self._partitions[group]] if group in self._partitions else []
+        else:
+            partitions = list(self._partitions.values())
+
+        results = []
+        for probe in probes:
+            probe = probe[None, :]
+            cand_ids, cand_rows = [], []
+            for partition in partitions:
+                for list_no in partition.nearest_lists(probe, self.nprobe)[0]:
+                    ids, matrix = partition.lists[list_no]
+                    if len(ids):
+                        cand_ids.append(ids)
+                        cand_rows.append(matrix)
+            if not cand_ids:
+                results.append([])
+                continue
+            ids, matrix = np.concatenate(cand_ids), np.concatenate(cand_rows)
+            results.extend(_top_k(ids, _squared_distances(probe, matrix), k))
+        return results
+
+    def entries(self):
+        ids, rows, groups = [], [], []
+        for group, partition in self._partitions.items():
+            for list_ids, matrix in partition.lists:
+                ids.append(list_ids)
+                rows.append(matrix)
+                groups.append(np.full(len(list_ids), group, dtype='U16'))
+        if not ids:
+            return BruteForceIndex().entries()
+        return np.concatenate(ids), np.concatenate(rows), np.concatenate(groups)
+
+    def _extra_state(self):
+        names = list(self._partitions)
+        return {
+            'centroid_groups': np.asarray(
+                [g for g in names for _ in self._partitions[g].centroids], dtype='U16'
+            ),
+            'centroids': (
+                np.concatenate([self._partitions[g].centroids for g in names])
+                if names else np.empty((0, DIMENSION), dtype=np.float32)
+            ),
+        }
+
+    def _restore(self, ids, matrix, groups, state):
+        if 'centroids' not in state:
+            return self.build(ids, matrix, groups)
+        self._partitions, self._location = {}, {}
+        centroid_groups, centroids = state['centroid_groups'], state['centroids']
+        for group in np.unique(centroid_groups):
+            group = str(group)
+            partition = _Partition(centroids[centroid_groups == group])
+            mask = groups == group
+            g_ids, g_matrix = ids[mask], matrix[mask]
+            self._fill(group, partition, g_ids, g_matrix, partition.assign(g_matrix))
+            self._partitions[group] = partition
+
+
+BACKENDS = {
+    BruteForceIndex.backend: BruteForceIndex,
+    IVFIndex.backend: IVFIndex,
+}
+
+
+def create_index(backend='brute', **options):
+    try:
+        return BACKENDS[backend](**options)
+    except KeyError:
+        raise ValueError(f"Unknown face index backend {backend!r}.") from None
+
+
+def load_index(path, backend=None, **options):
+    """
+    Read an index written by ``FaceIndex.save``. When ``backend`` is given the
+    file must have been written by that backend, otherwise ``ValueError``.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        state = {name: data[name] for name in data.files}
+    stored = str(state.pop('backend'))
+    if backend is not None and stored != backend:
+        raise ValueError(f"Index at {path} uses backend {stored!r}, not {backend!r}.")
+    index = create_index(stored, **options)
+    index.version = int(state.pop('version', 0))
+    index._restore(state.pop('ids'), state.pop('matrix'), state.pop('groups'), state)
+    return index
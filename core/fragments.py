@@ -0,0 +1,31 @@
+"""
+Versions that key the cached template fragments of the staff dashboards.
+
+The roster tables of ``teacher_dash.html`` and ``admin_dash.html`` sit in
+``{% cache %}`` blocks keyed by the cohort filter, the page cursor and
+``roster_version()``. Any change to a student's row bumps the version
+(``core.signals`` for single saves, explicit calls on the bulk paths), which
+orphans every cached roster page at once. The student materials table is
+keyed by ``student_portal.materials_key()`` in the same way.
+
+The versions live in the cache (``core.cache``), so other workers only stop
+using their old fragments when they share it; with a per-process cache they
+serve them until the 600-second timeout set in the templates.
+"""
+from . import cache
+
+ROSTER = 'roster'
+# User fields shown in, or filtering, the roster; last_login saves don't count.
+ROSTER_USER_FIELDS = {'username', 'enrollment_number', 'is_student', 'branch', 'semester'}
+
+
+def roster_version():
+    return cache.get_version(ROSTER)
+
+
+async def aroster_version():
+    return await cache.aget_version(ROSTER)
+
+
+def invalidate_roster():
+    cache.bump_version(ROSTER)
@@ -0,0 +1,200 @@
+"""
+Process-wide face-encoding gallery used for 1:N identification.
+
+The gallery wraps one of the identification indexes in ``core.face_index``
+(chosen by ``settings.FACE_INDEX``). It is loaded once per process, from the
+on-disk copy when that is current, otherwise from the database.
+
+Enrolments and resets are usually saved by a web process that never loads
+the gallery, while matching happens in the biometric workers. So every
+change, wherever it is made, moves on the shared version in
+``FaceGalleryState`` (in the same transaction as the change), and ``index()``
+compares that version before each match: a process whose copy is behind
+reloads it. The on-disk copy records the version it was written at and is
+only used while it is current. It is rewritten by whichever process next
+rebuilds from the database, once per version however many processes
+reload, never on the enrolment request itself.
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db.models import F
+
+from . import face_codec
+from .face_index import cohort_key, create_index, load_index
+from .models import FaceGalleryState, StudentData
+
+logger = logging.getLogger('core.biometrics')
+
+DEFAULT_CONFIG = {
+    'BACKEND': 'brute',
+    'OPTIONS': {},
+    'PATH': None,
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'FACE_INDEX', {})}
+
+
+def current_version():
+    return FaceGalleryState.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_version():
+    """Move the shared version on; returns the new value."""
+    if not FaceGalleryState.objects.filter(pk=1).update(version=F('version') + 1):
+        FaceGalleryState.objects.get_or_create(pk=1)
+        FaceGalleryState.objects.filter(pk=1).update(version=F('version') + 1)
+    return current_version()
+
+
+class FaceGallery:
+    """Lazily loaded, disk-backed identification index for enrolled students."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+
+    @property
+    def loaded(self):
+        return self._index is not None
+
+    def __len__(self):
+        return len(self._index) if self._index is not None else 0
+
+    # --- Loading & persistence ---
+
+    def _build_from_db(self, config):
+        rows = (
+            StudentData.objects.exclude(face_encoding__isnull=True)
+            .values_list('student_id', 'face_encoding', 'student__branch', 'student__semester')
+        )
+        ids, blobs, groups = [], [], []
+        for student_id, blob, branch, semester in rows.iterator():
+            if not blob:
+                continue
+            try:
+                face_codec.decode(blob)
+            except ValueError as exc:
+                logger.warning("Skipping the face encoding of student %s: %s", student_id, exc)
+                continue
+            ids.append(student_id)
+            blobs.append(blob)
+            groups.append(cohort_key(branch, semester))
+        index = create_index(config['BACKEND'], **config['OPTIONS'])
+        index.build(ids, face_codec.decode_many(blobs), groups)
+        return index
+
+    def _save(self, index, config):
+        if config['PATH']:
+            index.save(config['PATH'])
+
+    def load(self, rebuild=False):
+        """
+        Load the index from disk, or rebuild it from the database when there is
+        no usable file, it was written by another backend, or at an older
+        gallery version.
+        """
+        config = get_config()
+        path = config['PATH']
+        # Read before the data: a change committed meanwhile leaves this
+        # copy one version behind, so the next lookup loads again.
+        version = current_version()
+        index = None
+        if path and not rebuild and os.path.exists(path):
+            try:
+                index = load_index(path, config['BACKEND'], **config['OPTIONS'])
+            except (OSError, ValueError, KeyError):
+                index = None
+            if index is not None and index.version != version:
+                index = None
+        with self._lock:
+            if index is None:
+                index = self._build_from_db(config)
+                index.version = version
+                self._save(index, config)
+            self._index = index
+        return index
+
+    def index(self):
+        """Return the current index, reloading it when another process changed the gallery."""
+        index = self._index
+        if index is None or index.version != current_version():
+            return self.load()
+        return index
+
+    def clear(self):
+        """Drop the in-memory copy; the next lookup reloads it."""
+        with self._lock:
+            self._index = None
+
+    def invalidate(self):
+        """
+        Discard every process's copy after a bulk change that bypassed the
+        signals; each rebuilds on its next lookup.
+        """
+        bump_version()
+        path = get_config()['PATH']
+        with self._lock:
+            self._index = None
+            if path and os.path.exists(path):
+                os.unlink(path)
+
+    # --- Incremental maintenance (called from core.signals) ---
+
+    def _apply(self, change):
+        """Publish a change to every process, and apply it here when loaded and current."""
+        version = bump_version()
+        with self._lock:
+            index = self._index
+            if index is None:
+                return
+            if index.version != version - 1:
+                self._index = None  # missed another change; reload on the next lookup
+                return
+            try:
+                change(index)
+            except ValueError as exc:
+                logger.warning("Reloading the face gallery after a bad change: %s", exc)
+                self._index = None
+                return
+            index.version = version
+
+    def upsert(self, student_id, blob, group=''):
+        """Enrol or re-enrol a student from their stored (encoded) face."""
+        self._apply(lambda index: index.add(student_id, face_codec.decode(blob), group))
+
+    def remove(self, student_id):
+        self._apply(lambda index: index.remove(student_id))
+
+    def set_group(self, student_id, group):
+        """Move an enrolled student to another cohort partition."""
+        def move(index):
+            entry = index.get(student_id)
+            if entry is not None and entry[1] != group:
+                index.add(student_id, entry[0].copy(), group)
+        self._apply(move)
+
+    # --- Matching ---
+
+    def match(self, probes, tolerance=0.5, group=None):
+        """
+        Return ``(student_id, distance)`` for the closest gallery entry to any
+        of ``probes``, or ``None`` when nothing is within ``tolerance``.
+        ``group`` restricts the search to one cohort when it is known.
+        """
+        if not len(probes):
+            return None
+        best = None
+        for hits in self.index().query(probes, k=1, group=group):
+            if hits and (best is None or hits[0][1] < best[1]):
+                best = hits[0]
+        if best is None or best[1] > tolerance:
+            return None
+        return best
+
+
+face_gallery = FaceGallery()
@@ -0,0 +1,157 @@
+"""
+Batch grade entry for teachers.
+
+A batch (JSON rows or a CSV marks sheet) is validated as a whole; if any row
+is bad nothing is written. Otherwise the changed rows are written with one
+``bulk_update`` and their performance bands recomputed with set-based
+``UPDATE ... CASE`` statements, all in a single transaction, and the caller gets back a
+per-student diff of what changed.
+"""
+import csv
+import io
+import math
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from . import dashboard_stats, fragments, performance, student_portal
+from .models import StudentData
+
+MAX_ROWS = 2000
+FIELDS = ('marks', 'attendance')
+
+
+class GradeError(ValueError):
+    """The batch was rejected; ``errors`` lists ``(row, message)`` pairs."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+
+# --- 1. Parsing ---
+
+def rows_from_json(payload):
+    rows = payload.get('rows') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise GradeError([(0, "Expected a list of rows.")])
+    return list(enumerate(rows, start=1))
+
+
+def rows_from_csv(file):
+    """Rows of a marks sheet with enrollment_number (or id) plus marks and/or attendance."""
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or not {'enrollment_number', 'id'} & set(reader.fieldnames):
+        raise GradeError([(1, "The sheet needs an enrollment_number or id column.")])
+    return [
+        (number, {key: value for key, value in row.items() if value not in (None, '')})
+        for number, row in enumerate(reader, start=2)
+    ]
+
+
+def _number(value, field):
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be a finite number")
+    return number
+
+
+def _clean(row):
+    if not isinstance(row, dict):
+        raise ValueError("not an object")
+    cleaned = {}
+    if row.get('id') not in (None, ''):
+        cleaned['id'] = int(row['id'])
+    elif row.get('enrollment_number') not in (None, ''):
+        cleaned['enrollment_number'] = str(row['enrollment_number']).strip()
+    else:
+        raise ValueError("needs id or enrollment_number")
+    if row.get('marks') not in (None, ''):
+        marks = int(_number(row['marks'], 'marks'))
+        if not 0 <= marks <= 100:
+            raise ValueError(f"marks {marks} out of range 0-100")
+        cleaned['marks'] = marks
+    if row.get('attendance') not in (None, ''):
+        attendance = _number(row['attendance'], 'attendance')
+        if attendance < 0:
+            raise ValueError("attendance can't be negative")
+        cleaned['attendance'] = attendance
+    if not set(FIELDS) & set(cleaned):
+        raise ValueError("nothing to update")
+    return cleaned
+
+
+# --- 2. Applying ---
+
+def apply(numbered_rows, dry_run=False):
+    """
+    Validate and apply ``(row_number, row)`` pairs. Returns
+    ``{'updated': n, 'unchanged': n, 'diff': [...]}``; raises GradeError.
+    """
+    if len(numbered_rows) > MAX_ROWS:
+        raise GradeError([(0, f"At most {MAX_ROWS} rows per batch.")])
+    errors, cleaned = [], []
+    for number, row in numbered_rows:
+        try:
+            cleaned.append((number, _clean(row)))
+        except (TypeError, ValueError) as exc:
+            errors.append((number, str(exc)))
+    if errors:
+        raise GradeError(errors)
+
+    with transaction.atomic():
+        ids = [row['id'] for _, row in cleaned if 'id' in row]
+        enrollments = [row['enrollment_number'] for _, row in cleaned if 'enrollment_number' in row]
+        profiles = (
+            StudentData.objects.select_for_update(of=('self',))
+            .select_related('student')
+            .only('marks', 'attendance', 'performance', 'student__enrollment_number', 'student__branch', 'student__semester')
+            .annotate(has_face=ExpressionWrapper(Q(face_encoding__isnull=False), output_field=BooleanField()))
+            .filter(Q(pk__in=ids) | Q(student__enrollment_number__in=enrollments))
+        )
+        by_id, by_enrollment = {}, {}
+        for profile in profiles:
+            by_id[profile.pk] = profile
+            by_enrollment[profile.student.enrollment_number] = profile
+
+        changed, diff, seen = {}, [], set()
+        before, after = Counter(), Counter()
+        for number, row in cleaned:
+            profile = by_id.get(row['id']) if 'id' in row else by_enrollment.get(row['enrollment_number'])
+            if profile is None:
+                errors.append((number, "unknown student"))
+                continue
+            if profile.pk in seen:
+                errors.append((number, "student appears twice in the batch"))
+                continue
+            seen.add(profile.pk)
+            delta = {field: [getattr(profile, field), row[field]]
+                     for field in FIELDS if field in row and getattr(profile, field) != row[field]}
+            if not delta:
+                continue
+            student = profile.student
+            band = performance.band_for(row.get('marks', profile.marks), student.branch, student.semester)
+            if band != profile.performance:
+                delta['performance'] = [profile.performance, band]
+            diff.append({'id': profile.pk, 'enrollment_number': profile.student.enrollment_number, **delta})
+
+            before.update(dashboard_stats.student_contribution(profile.performance, profile.attendance, profile.has_face))
+            for field, (_, value) in delta.items():
+                setattr(profile, field, value)
+            after.update(dashboard_stats.student_contribution(profile.performance, profile.attendance, profile.has_face))
+            changed[profile.pk] = profile
+        if errors:
+            raise GradeError(errors)
+
+        if changed and not dry_run:
+            StudentData.objects.bulk_update(changed.values(), FIELDS, batch_size=500)
+            StudentData.objects.filter(pk__in=changed).recompute_performance()
+            # bulk_update()/update() skip the signals that keep these current.
+            dashboard_stats.apply(before, after)
+            student_ids = [profile.student_id for profile in changed.values()]
+            transaction.on_commit(lambda: student_portal.invalidate_profile(*student_ids))
+            transaction.on_commit(fragments.invalidate_roster)
+
+    return {'updated': len(changed), 'unchanged': len(cleaned) - len(changed), 'diff': diff}
@@ -0,0 +1,47 @@
+"""
+Password hashers whose cost comes from ``settings.PASSWORD_HASHING``.
+
+Django's hashers fix their cost in the class. These read it from settings,
+so it can be tuned per deployment after measuring it with
+``manage.py bench_login``. When the algorithm or cost changes, existing
+hashes stay valid: Django's ``must_update`` notices the old parameters and
+the password is rehashed the next time that user logs in.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher,
+)
+
+DEFAULTS = {
+    'ALGORITHM': 'pbkdf2_sha256',  # 'scrypt', 'argon2' (needs argon2-cffi) or 'pbkdf2_sha256'
+    'PBKDF2_ITERATIONS': PBKDF2PasswordHasher.iterations,
+    'SCRYPT_WORK_FACTOR': ScryptPasswordHasher.work_factor,
+    'ARGON2_TIME_COST': Argon2PasswordHasher.time_cost,
+    'ARGON2_MEMORY_COST': Argon2PasswordHasher.memory_cost,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return get_config()['PBKDF2_ITERATIONS']
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return get_config()['SCRYPT_WORK_FACTOR']
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return get_config()['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return get_config()['ARGON2_MEMORY_COST']
@@ -0,0 +1,281 @@
+"""
+Where the time goes: per-view timings, spans and sampled profiles.
+
+``InstrumentationMiddleware`` times every request and attributes to its
+view the wall time, the number and duration of database queries (an
+execute wrapper installed on each new connection) and the time spent
+rendering templates (``InstrumentedDjangoTemplates``). Code can add its own
+``span()``; the biometric paths also report the stage timings the pipeline
+measured in the worker (``record_stages``).
+
+Samples go into rolling windows per series, kept in process memory, from
+which p50/p95/p99 are computed on demand. Staff can read them as JSON
+(``metrics_dashboard``); ``/metrics`` serves the Prometheus text format.
+Each worker process reports its own window.
+
+With ``PROFILE_SAMPLE_RATE`` above zero, that fraction of requests runs
+under cProfile (or pyinstrument) and the profile is kept only when the
+request turns out slower than ``PROFILE_SLOW_MS``.
+"""
+import contextvars
+import cProfile
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import DjangoTemplates, Template
+
+DEFAULTS = {
+    'ENABLED': True,
+    'WINDOW': 1024,                # samples kept per series
+    'TOKEN': '',                   # bearer token for scrapers, besides staff sessions
+    'PROFILE_SAMPLE_RATE': 0.0,    # fraction of requests run under the profiler
+    'PROFILE_SLOW_MS': 500,        # keep the profile only above this wall time
+    'PROFILE_DIR': 'profiles',
+    'PROFILER': 'cprofile',        # or 'pyinstrument' (pip install pyinstrument)
+}
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = 'academy_'
+
+_current = contextvars.ContextVar('instrumentation_request', default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'INSTRUMENTATION', {})}
+
+
+# --- 1. Rolling histograms ---
+
+class Series:
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        return {q: ordered[max(0, math.ceil(q * len(ordered)) - 1)] if ordered else 0.0 for q in QUANTILES}
+
+
+_series = {}
+_lock = threading.Lock()
+
+
+def observe(name, value, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = Series(get_config()['WINDOW'])
+        series.observe(value)
+
+
+def snapshot():
+    """``[{'name', 'labels', 'count', 'sum', 'p50', 'p95', 'p99'}]`` for every series."""
+    with _lock:
+        items = [(name, labels, series.count, series.total, series.quantiles())
+                 for (name, labels), series in sorted(_series.items())]
+    return [
+        {'name': name, 'labels': dict(labels), 'count': count, 'sum': total,
+         **{f'p{round(q * 100)}': value for q, value in quantiles.items()}}
+        for name, labels, count, total, quantiles in items
+    ]
+
+
+def reset():
+    with _lock:
+        _series.clear()
+
+
+def _label_text(labels, **extra):
+    pairs = {**labels, **extra}
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for value in pairs.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(pairs, escaped)) + '}' if pairs else ''
+
+
+def prometheus():
+    """Every series as a Prometheus summary, in the text exposition format."""
+    lines, typed = [], set()
+    for row in snapshot():
+        name = PREFIX + re.sub(r'[^a-zA-Z0-9_]', '_', row['name'])
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {name} summary')
+        for q in QUANTILES:
+            lines.append(f"{name}{_label_text(row['labels'], quantile=q)} {row[f'p{round(q * 100)}']:.6g}")
+        lines.append(f"{name}_sum{_label_text(row['labels'])} {row['sum']:.6g}")
+        lines.append(f"{name}_count{_label_text(row['labels'])} {row['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+# --- 2. Spans ---
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+
+
+@contextmanager
+def span(name):
+    """Time a block of code into ``span_seconds{span=name}``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('span_seconds', time.perf_counter() - started, span=name)
+
+
+def record_stages(kind, timings_ms):
+    """Record the per-stage timings a biometric job measured in its worker."""
+    for stage, milliseconds in timings_ms.items():
+        observe('biometric_stage_seconds', milliseconds / 1000, kind=kind, stage=stage)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_wrapper)
+
+
+class _TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name).template, self)
+
+
+# --- 3. Sampled profiling ---
+
+_profiling = threading.Lock()  # one profiler per process at a time
+
+
+class _Profile:
+    def __init__(self, config):
+        self.config = config
+        if config['PROFILER'] == 'pyinstrument':
+            from pyinstrument import Profiler
+            self.profiler = Profiler(async_mode='enabled')
+        else:
+            self.profiler = cProfile.Profile()
+        self.profiler.start() if hasattr(self.profiler, 'start') else self.profiler.enable()
+
+    def stop(self, view, elapsed):
+        self.profiler.stop() if hasattr(self.profiler, 'start') else self.profiler.disable()
+        if elapsed * 1000 < self.config['PROFILE_SLOW_MS']:
+            return None
+        directory = os.path.join(settings.BASE_DIR, self.config['PROFILE_DIR'])
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r'[^\w.-]', '_', view)
+        stem = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{slug}")
+        if isinstance(self.profiler, cProfile.Profile):
+            path = stem + '.prof'
+            self.profiler.dump_stats(path)
+        else:
+            path = stem + '.html'
+            with open(path, 'w') as fh:
+                fh.write(self.profiler.output_html())
+        return path
+
+
+def _maybe_profile(config):
+    if config['PROFILE_SAMPLE_RATE'] <= 0 or random.random() >= config['PROFILE_SAMPLE_RATE']:
+        return None
+    if not _profiling.acquire(blocking=False):
+        return None
+    try:
+        return _Profile(config)
+    except Exception:
+        _profiling.release()
+        raise
+
+
+# --- 4. Middleware ---
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_config()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, token, profile = self._start()
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(request, started, token, profile)
+
+    async def __acall__(self, request):
+        started, token, profile = self._start()
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(request, started, token, profile)
+
+    def _start(self):
+        token = _current.set(RequestStats())
+        return time.perf_counter(), token, _maybe_profile(get_config())
+
+    def _finish(self, request, started, token, profile):
+        elapsed = time.perf_counter() - started
+        stats = _current.get()
+        _current.reset(token)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        if profile is not None:
+            try:
+                profile.stop(view, elapsed)
+            finally:
+                _profiling.release()
+        observe('request_seconds', elapsed, view=view)
+        observe('request_db_queries', stats.queries, view=view)
+        observe('request_db_seconds', stats.query_time, view=view)
+        observe('request_template_seconds', stats.template_time, view=view)
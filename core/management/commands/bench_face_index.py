@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.face_index import DIMENSION, create_index
+
+
+def synthetic_gallery(size, rng, spread=0.35):
+    """Clustered unit-scale vectors roughly shaped like dlib encodings."""
+    centres = rng.normal(0, 0.12, (max(1, size // 50), DIMENSION)).astype(np.float32)
+    labels = rng.integers(0, len(centres), size)
+    noise = rng.normal(0, spread / np.sqrt(DIMENSION), (size, DIMENSION)).astype(np.float32)
+    return centres[labels] + noise
+
+
+class Command(BaseCommand):
+    help = "Benchmark face index query latency on synthetic encodings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+        parser.add_argument('--backends', nargs='+', default=['brute', 'ivf'])
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--nprobe', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        header = f"{'backend':<8}{'size':>9}{'build s':>10}{'p50 ms':>9}{'p95 ms':>9}{'recall@1':>10}"
+        self.stdout.write(header)
+
+        for size in options['sizes']:
+            gallery = synthetic_gallery(size, rng)
+            ids = np.arange(size, dtype=np.int64)
+            targets = rng.integers(0, size, options['queries'])
+            probes = gallery[targets] + rng.normal(
+                0, 0.02, (len(targets), DIMENSION)).astype(np.float32)
+
+            for backend in options['backends']:
+                extra = {'nprobe': options['nprobe']} if backend == 'ivf' else {}
+                index = create_index(backend, **extra)
+                started = time.perf_counter()
+                index.build(ids, gallery)
+                build_s = time.perf_counter() - started
+
+                timings, hits = [], 0
+                for probe, target in zip(probes, targets):
+                    started = time.perf_counter()
+                    result = index.query(probe, k=1)[0]
+                    timings.append((time.perf_counter() - started) * 1000)
+                    hits += bool(result) and result[0][0] == target
+
+                self.stdout.write(
+                    f"{backend:<8}{size:>9}{build_s:>10.2f}"
+                    f"{np.percentile(timings, 50):>9.3f}{np.percentile(timings, 95):>9.3f}"
+                    f"{hits / len(targets):>10.3f}"
+                )
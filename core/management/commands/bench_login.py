@@ -0,0 +1,84 @@
+import os
+import time
+from importlib import import_module
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import authenticate, login
+from django.contrib.auth.hashers import get_hasher, get_hashers, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from core.models import User
+
+PREFIX = 'benchlogin-'
+PASSWORD = 'correct horse battery staple'
+
+
+def _cost(hasher):
+    for name in ('iterations', 'work_factor', 'time_cost'):
+        if hasattr(hasher, name):
+            extra = f', memory_cost={hasher.memory_cost}' if name == 'time_cost' else ''
+            return f'{name}={getattr(hasher, name)}{extra}'
+    return ''
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure student logins per second on one core for each password hasher "
+        "(enrollment lookup, password check, session login), using throwaway "
+        f"'{PREFIX}*' accounts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help="Logins timed per hasher.")
+        parser.add_argument('--algorithms', nargs='+', help="Default: every configured hasher that loads.")
+        parser.add_argument('--peak', type=int, default=2000, help="Logins in the morning rush to size for.")
+
+    def handle(self, *args, **options):
+        algorithms = options['algorithms'] or [hasher.algorithm for hasher in get_hashers()]
+        cores = os.cpu_count() or 1
+        factory, engine = RequestFactory(), import_module(settings.SESSION_ENGINE)
+        self.stdout.write(f"{'hasher':<15}{'cost':<38}{'p50 ms':>8}{'p95 ms':>8}{'logins/s/core':>15}{'queries':>9}")
+
+        User.objects.filter(username__startswith=PREFIX).delete()
+        try:
+            for algorithm in dict.fromkeys(algorithms):
+                try:
+                    hasher = get_hasher(algorithm)
+                    encoded = make_password(PASSWORD, hasher=algorithm)
+                except ValueError as exc:
+                    self.stderr.write(f"{algorithm}: skipped ({exc})")
+                    continue
+                user = User.objects.create(
+                    username=f'{PREFIX}{algorithm}', enrollment_number=f'{PREFIX}{algorithm}'[:20],
+                    is_student=True, password=encoded,
+                )
+
+                timings, queries = [], None
+                for i in range(options['logins']):
+                    request = factory.post('/login/')
+                    request.session = engine.SessionStore()
+                    started = time.perf_counter()
+                    with CaptureQueriesContext(connection) as captured:
+                        authenticated = authenticate(request, enrollment=user.enrollment_number, password=PASSWORD)
+                        if authenticated is None:
+                            raise CommandError(f"{algorithm}: login failed.")
+                        login(request, authenticated)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    queries = len(captured) if queries is None else queries
+                    request.session.delete()
+
+                p50, p95 = np.percentile(timings, [50, 95])
+                per_second = 1000 / np.mean(timings)
+                self.stdout.write(
+                    f"{algorithm:<15}{_cost(hasher):<38}{p50:>8.1f}{p95:>8.1f}{per_second:>15.1f}{queries:>9}"
+                )
+                self.stdout.write(
+                    f"{'':<15}{options['peak']} logins: {options['peak'] / per_second:.0f} core-seconds, "
+                    f"{options['peak'] / per_second / cores:.0f}s on {cores} cores"
+                )
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
@@ -0,0 +1,83 @@
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Material, StudentData, User
+
+PREFIX = 'benchrender-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Time each dashboard with cold caches (every fragment rendered) and warm "
+        f"(cached fragments reused), on throwaway '{PREFIX}*' data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--students', type=int, default=50)
+        parser.add_argument('--materials', type=int, default=30)
+
+    def handle(self, *args, **options):
+        self.cleanup()
+        teacher = User.objects.create_user(f'{PREFIX}teacher', is_teacher=True, is_staff=True)
+        students = [
+            User.objects.create_user(f'{PREFIX}{i}', enrollment_number=f'{PREFIX}{i}'[:20],
+                                     is_student=True, branch='CE', semester=1)
+            for i in range(options['students'])
+        ]
+        # One by one: the cascade delete in cleanup() runs the signals that keep
+        # the dashboard counters, so creation must run them too.
+        for i, student in enumerate(students):
+            StudentData.objects.create(student=student, marks=i % 100)
+        Material.objects.bulk_create([
+            Material(title=f'{PREFIX}{i}', branch='CE', semester=1, teacher=teacher,
+                     video_link=f'https://example.invalid/{i}' if i % 2 else None)
+            for i in range(options['materials'])
+        ])
+        pages = [
+            ('student_dash', students[0]),
+            ('teacher_dash', teacher),
+            ('admin_dashboard', teacher),
+        ]
+        self.stdout.write(f"{'page':<17}{'cold p50':>10}{'warm p50':>10}{'warm p95':>10}{'queries':>9}")
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for name, user in pages:
+                    self.run(name, user, options['requests'])
+        finally:
+            self.cleanup()
+
+    def run(self, name, user, requests):
+        client = Client()
+        client.force_login(user)
+        url = reverse(name) + ('' if name == 'student_dash' else '?branch=CE&semester=1')
+
+        def timed(clear):
+            timings, queries = [], 0
+            for _ in range(requests):
+                if clear:
+                    cache.clear()  # the 'default' cache only; the session survives
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as captured:
+                    client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+                queries += len(captured)
+            return timings, queries / requests
+
+        cold, _ = timed(clear=True)
+        warm, queries = timed(clear=False)
+        self.stdout.write(
+            f"{name:<17}{np.percentile(cold, 50):>10.2f}{np.percentile(warm, 50):>10.2f}"
+            f"{np.percentile(warm, 95):>10.2f}{queries:>9.1f}"
+        )
+
+    def cleanup(self):
+        Material.objects.filter(title__startswith=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import StudentData, User
+
+USERNAME = 'benchsessions-student'
+
+
+class Command(BaseCommand):
+    help = (
+        "Count database round trips and time a warm student_dash request "
+        "under each session engine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', nargs='+', default=['db', 'cached_db', 'cache', 'signed_cookies'])
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        User.objects.filter(username=USERNAME).delete()
+        student = User.objects.create_user(USERNAME, is_student=True, branch='CE', semester=1)
+        StudentData.objects.create(student=student)
+        self.stdout.write(f"{'engine':<16}{'queries':>8}{'session':>9}{'p50 ms':>9}{'p95 ms':>9}")
+        try:
+            for engine in options['engines']:
+                with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{engine}',
+                                       ALLOWED_HOSTS=['testserver']):
+                    self.run(engine, student, options['requests'])
+        finally:
+            User.objects.filter(username=USERNAME).delete()
+
+    def run(self, engine, student, requests):
+        client = Client()
+        client.force_login(student)
+        client.get(reverse('student_dash'))  # warm the dashboard caches
+
+        timings, queries, session_queries = [], 0, 0
+        for _ in range(requests):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                client.get(reverse('student_dash'))
+            timings.append((time.perf_counter() - started) * 1000)
+            queries += len(captured)
+            session_queries += sum('django_session' in query['sql'] for query in captured)
+
+        p50, p95 = np.percentile(timings, [50, 95])
+        self.stdout.write(
+            f"{engine:<16}{queries / requests:>8.2f}{session_queries / requests:>9.2f}{p50:>9.2f}{p95:>9.2f}"
+        )
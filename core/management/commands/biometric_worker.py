@@ -0,0 +1,96 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import biometric_jobs
+from core.biometrics import get_config
+from core.worker_bootstrap import init_worker
+
+
+class Command(BaseCommand):
+    help = "Run the biometric job worker: claims queued face jobs and scores them in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Pool size (defaults to BIOMETRICS['WORKERS'] or the CPU count).")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue once and exit instead of polling forever.")
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or biometric_jobs.default_workers()
+        poll = get_config()['POLL_INTERVAL']
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        pool = self.start_pool(workers)
+        self.stdout.write(f"Biometric worker started with {workers} processes.")
+        in_flight = {}
+        last_purge = 0.0
+        try:
+            while not self._stopping:
+                close_old_connections()
+                # Keep every process busy plus one queued job each.
+                claimed = biometric_jobs.claim(workers * 2 - len(in_flight))
+                try:
+                    for job in claimed:
+                        future = pool.submit(
+                            biometric_jobs.run_job, job.kind, bytes(job.frames),
+                            job.reference and bytes(job.reference), job.group,
+                        )
+                        in_flight[future] = job.pk
+                except BrokenProcessPool:
+                    submitted = set(in_flight.values())
+                    pool = self.restart_pool(pool, workers, in_flight,
+                                             [job.pk for job in claimed if job.pk not in submitted])
+                    continue
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+                    if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                        pool = self.restart_pool(pool, workers, in_flight)
+                        continue
+                    for future in done:
+                        biometric_jobs.finish(in_flight.pop(future), future)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(poll)
+
+                if time.monotonic() - last_purge > 60:
+                    biometric_jobs.purge()
+                    last_purge = time.monotonic()
+        finally:
+            for future, job_id in in_flight.items():
+                biometric_jobs.finish(job_id, future)
+            pool.shutdown(wait=True)
+        self.stdout.write("Biometric worker stopped.")
+
+    def start_pool(self, workers):
+        # 'spawn' so children never inherit the parent's DB connections.
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+        )
+
+    def restart_pool(self, pool, workers, in_flight, unsubmitted=()):
+        """
+        A pool process died (out of memory, killed) and took the pool with it:
+        fail the jobs it held, requeue the ones it never got, start a new pool.
+        """
+        self.stderr.write("A pool process died; restarting the pool.")
+        for future, job_id in in_flight.items():
+            biometric_jobs.finish(job_id, future)
+        in_flight.clear()
+        biometric_jobs.release(unsubmitted)
+        pool.shutdown(wait=False, cancel_futures=True)
+        return self.start_pool(workers)
+
+    def _stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,185 @@
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import dashboard_stats, fragments
+from core.models import StudentData, User
+from core.performance import band_for
+from core.worker_bootstrap import init_django
+
+REQUIRED_COLUMNS = ('username', 'enrollment_number', 'email', 'password', 'branch', 'semester')
+BRANCHES = {code for code, _ in User.BRANCH_CHOICES}
+SEMESTERS = {value for value, _ in User.SEM_CHOICES}
+
+
+def read_rows(path):
+    """Yield (row_number, dict) from a CSV or XLSX file without loading it whole."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            for number, row in enumerate(csv.DictReader(fh), start=2):
+                yield number, row
+    elif extension in ('.xlsx', '.xlsm'):
+        try:
+            import openpyxl
+        except ImportError:
+            raise CommandError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if any(value is not None for value in values):
+                    yield number, dict(zip(header, values))
+        finally:
+            workbook.close()
+    else:
+        raise CommandError(f"Unsupported file type '{extension}'; use .csv or .xlsx.")
+
+
+def clean_row(row):
+    """Normalise one sheet row; raises ValueError with a readable message."""
+    missing = [column for column in REQUIRED_COLUMNS if row.get(column) in (None, '')]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    # Excel hands numeric enrollment numbers back as floats ("2201...0")
+    enrollment = str(row['enrollment_number']).strip().split('.')[0]
+    branch = str(row['branch']).strip().upper()
+    if branch not in BRANCHES:
+        raise ValueError(f"unknown branch '{row['branch']}'")
+    try:
+        semester = int(float(row['semester']))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid semester '{row['semester']}'")
+    if semester not in SEMESTERS:
+        raise ValueError(f"semester {semester} out of range")
+    password = row['password']
+    if isinstance(password, float) and password.is_integer():
+        password = int(password)
+    return {
+        'enrollment': enrollment,
+        'full_name': str(row['username']).strip(),
+        'email': str(row['email']).strip(),
+        'password': str(password),
+        'branch': branch,
+        'semester': semester,
+    }
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Bulk-import students from a CSV/XLSX sheet (username, enrollment_number, email, password, branch, semester)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file to import.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Rows per transaction (default 500).")
+        parser.add_argument('--hash-workers', type=int, default=None,
+                            help="Processes used for password hashing (default: CPU count).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Validate and report without writing anything.")
+
+    def handle(self, *args, **options):
+        path, dry_run = options['path'], options['dry_run']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        # One query for everything already enrolled; usernames are enrollment numbers.
+        existing = set()
+        for username, enrollment in User.objects.values_list('username', 'enrollment_number'):
+            existing.add(username)
+            if enrollment:
+                existing.add(enrollment)
+
+        workers = options['hash_workers'] or multiprocessing.cpu_count()
+        pool = None
+        if not dry_run and workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_django,
+            )
+
+        created = skipped = 0
+        errors = []
+        try:
+            for chunk in chunked(read_rows(path), options['batch_size']):
+                students = []
+                for number, row in chunk:
+                    try:
+                        student = clean_row(row)
+                    except ValueError as exc:
+                        errors.append((number, str(exc)))
+                        continue
+                    if student['enrollment'] in existing:
+                        skipped += 1
+                        continue
+                    existing.add(student['enrollment'])
+                    students.append(student)
+
+                if students and not dry_run:
+                    self._create(students, pool)
+                created += len(students)
+                self.stdout.write(
+                    f"{'Validated' if dry_run else 'Imported'} {created} students "
+                    f"({skipped} already present, {len(errors)} errors)"
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        if created and not dry_run:
+            # bulk_create skips the signals that maintain the counters and roster cache
+            dashboard_stats.rebuild()
+            fragments.invalidate_roster()
+
+        for number, message in errors:
+            self.stderr.write(f"Row {number}: {message}")
+        summary = f"{'Dry run: would create' if dry_run else 'Created'} {created} students, " \
+                  f"skipped {skipped} existing, {len(errors)} rows with errors."
+        self.stdout.write(self.style.SUCCESS(summary) if not errors else self.style.WARNING(summary))
+
+    def _create(self, students, pool):
+        passwords = [student['password'] for student in students]
+        if pool is not None:
+            hashes = list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // 32)))
+        else:
+            hashes = [make_password(password) for password in passwords]
+
+        users = [
+            User(
+                username=student['enrollment'],  # Use enrollment for login
+                first_name=student['full_name'],  # Save Full Name here
+                email=student['email'],
+                password=password_hash,
+                enrollment_number=student['enrollment'],
+                branch=student['branch'],
+                semester=student['semester'],
+                is_student=True,
+            )
+            for student, password_hash in zip(students, hashes)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            if any(user.pk is None for user in users):
+                # Backends that cannot return ids from bulk inserts.
+                ids = dict(User.objects.filter(
+                    username__in=[user.username for user in users]
+                ).values_list('username', 'id'))
+                for user in users:
+                    user.pk = ids[user.username]
+            # bulk_create skips the pre_save signal that bands new profiles
+            StudentData.objects.bulk_create([
+                StudentData(student=user, performance=band_for(0, user.branch, user.semester))
+                for user in users
+            ])
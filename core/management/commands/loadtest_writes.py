@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Sum
+
+from core import attendance
+from core.models import AssignmentSubmission, AttendanceEvent, LiveSession, StudentData, User
+
+PREFIX = 'loadtest-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a scratch copy of the configured database (the test database Django "
+        "would create: a temporary file for SQLite, test_<NAME> on PostgreSQL) with "
+        "concurrent attendance and submission writes and report throughput, latency "
+        "and lock errors. The scratch database is dropped afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=50, help="Writes per worker.")
+        parser.add_argument('--students', type=int, default=64)
+
+    def handle(self, *args, **options):
+        configured = connection.settings_dict['NAME']
+        scratch = None
+        if connection.vendor == 'sqlite':
+            # An in-memory test database can't be shared between the worker threads.
+            scratch = tempfile.mkdtemp(prefix=PREFIX)
+            connection.settings_dict['TEST']['NAME'] = os.path.join(scratch, 'db.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.load(options['workers'], options['iterations'], options['students'])
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(configured, verbosity=0)
+            if scratch:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+    def load(self, workers, iterations, count):
+        students = [
+            User.objects.create_user(f'{PREFIX}{i}', is_student=True, branch='CE', semester=1)
+            for i in range(max(count, workers))
+        ]
+        for student in students:
+            StudentData.objects.create(student=student)
+        session = LiveSession.objects.create(meeting_link='https://example.invalid/loadtest', is_active=False)
+        self.stdout.write(f"backend: {self.describe()}  workers: {workers}  writes/worker: {iterations}")
+
+        start = threading.Barrier(workers)
+
+        def work(worker):
+            timings, errors = defaultdict(list), Counter()
+            mine = students[worker::workers]
+            try:
+                start.wait()
+                for i in range(iterations):
+                    student = mine[i % len(mine)]
+                    kind = 'attendance' if i % 2 == 0 else 'submission'
+                    began = time.perf_counter()
+                    try:
+                        if kind == 'attendance':
+                            attendance.record(student, session)
+                        else:
+                            AssignmentSubmission.objects.create(
+                                student=student, assignment_name='Load test',
+                                submission_file='submissions/loadtest.pdf',
+                            )
+                    except Exception as exc:
+                        errors[f'{kind}: {type(exc).__name__}: {exc}'] += 1
+                    else:
+                        timings[kind].append((time.perf_counter() - began) * 1000)
+            finally:
+                connection.close()  # this thread's connection
+            return timings, errors
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(work, range(workers)))
+        elapsed = time.perf_counter() - began
+
+        timings, errors = defaultdict(list), Counter()
+        for worker_timings, worker_errors in results:
+            for kind, values in worker_timings.items():
+                timings[kind] += values
+            errors.update(worker_errors)
+
+        self.stdout.write(f"{'write':<12}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for kind, values in sorted(timings.items()):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            self.stdout.write(f"{kind:<12}{len(values):>7}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}")
+        done = sum(len(values) for values in timings.values())
+        self.stdout.write(f"{done} writes in {elapsed:.2f}s ({done / elapsed:.0f}/s)")
+
+        recorded = AttendanceEvent.objects.filter(session=session).count()
+        counted = StudentData.objects.filter(student__in=students).aggregate(total=Sum('attendance'))['total']
+
+        for message, count in errors.most_common():
+            self.stderr.write(f"{count} x {message}")
+        if errors:
+            raise CommandError(f"{sum(errors.values())} writes failed.")
+        if recorded != len(timings['attendance']) or counted != recorded:
+            raise CommandError(f"Attendance drifted: {recorded} events recorded, {counted} counted.")
+        self.stdout.write(self.style.SUCCESS("No lock errors; attendance totals consistent."))
+
+    def describe(self):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                return f"sqlite ({cursor.fetchone()[0]})"
+        pool = 'pooled' if connection.settings_dict['OPTIONS'].get('pool') else (
+            f"CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}")
+        return f"{connection.vendor} ({pool})"
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.models import User
+from core.promotion import cohort, preview, promote
+
+
+class Command(BaseCommand):
+    help = "Promote a branch/semester cohort to the next semester and graduate final-semester students."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', choices=[code for code, _ in User.BRANCH_CHOICES],
+                            help="Only promote this branch (default: all branches).")
+        parser.add_argument('--semester', type=int, choices=[value for value, _ in User.SEM_CHOICES],
+                            help="Only promote students currently in this semester.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would change without updating anything.")
+
+    def handle(self, *args, **options):
+        students = cohort(branch=options['branch'], semester=options['semester'])
+        if options['dry_run']:
+            promoted, graduated = preview(students)
+            self.stdout.write(f"Dry run: would promote {promoted} and graduate {graduated} students.")
+            return
+        promoted, graduated = promote(students)
+        self.stdout.write(self.style.SUCCESS(f"Promoted {promoted} students, graduated {graduated}."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core import uploads
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned chunked uploads (and their .part files) older than UPLOADS['TTL']."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl', type=int, default=None,
+                            help="Age in seconds after which an upload is purged.")
+
+    def handle(self, *args, **options):
+        removed = uploads.purge(options['ttl'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {removed} upload sessions."))
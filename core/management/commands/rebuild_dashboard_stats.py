@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core import dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed admin dashboard counters from the database."
+
+    def handle(self, *args, **options):
+        stats = dashboard_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(stats)} counters ({stats['students']} students, {stats['faces']} faces)."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.gallery import face_gallery, get_config
+
+
+class Command(BaseCommand):
+    help = "Rebuild the face identification index from StudentData and write it to disk."
+
+    def handle(self, *args, **options):
+        index = face_gallery.load(rebuild=True)
+        config = get_config()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} encodings with the '{config['BACKEND']}' backend"
+            + (f" -> {config['PATH']}" if config['PATH'] else "")
+        ))
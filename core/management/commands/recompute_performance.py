@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core import dashboard_stats
+from core.models import StudentData
+from core.promotion import cohort
+
+
+class Command(BaseCommand):
+    help = "Re-band StudentData.performance from marks with the current PERFORMANCE_BANDS, in set-based UPDATEs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', help="Only this branch (e.g. CE).")
+        parser.add_argument('--semester', type=int, help="Only this semester.")
+
+    def handle(self, *args, **options):
+        students = cohort(options['branch'], options['semester'])
+        changed = StudentData.objects.filter(student__in=students).recompute_performance()
+        if changed:
+            # QuerySet.update() skips the signals that maintain the band counters.
+            dashboard_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Re-banded {changed} students."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import attendance
+
+
+class Command(BaseCommand):
+    help = "Fold attendance events that have not been counted yet into StudentData.attendance."
+
+    def handle(self, *args, **options):
+        counted = attendance.rollup()
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {counted} attendance events."))
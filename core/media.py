@@ -0,0 +1,178 @@
+"""
+Serving uploaded media (materials, assignment submissions).
+
+Files are streamed rather than read into memory, with single-range requests
+(206 / 416), ETag and Last-Modified validators and 304 responses. When the
+front-end server is set up for it, ``settings.MEDIA_SERVING['OFFLOAD']``
+hands the transfer to it instead (``'sendfile'`` for Apache/lighttpd
+``X-Sendfile``, ``'accel'`` for nginx ``X-Accel-Redirect``) so no Django
+worker is held for the length of a download.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from .models import AssignmentSubmission, Material
+
+DEFAULTS = {
+    'OFFLOAD': None,                  # None, 'sendfile' or 'accel'
+    'ACCEL_PREFIX': '/protected-media/',
+    'CHUNK_SIZE': 64 * 1024,
+    'MAX_AGE': 3600,
+}
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SERVED = ('materials', 'submissions')  # the only MEDIA_ROOT subdirectories ever served
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'MEDIA_SERVING', {})}
+
+
+# --- 1. Permissions ---
+
+def clean_name(name):
+    """
+    ``name`` normalised, or ``None`` when it is absolute, has a ``..``
+    segment or doesn't lie under one of the SERVED directories.
+    """
+    if name.startswith('/') or '\\' in name or '..' in name.split('/'):
+        return None
+    name = posixpath.normpath(name)
+    return name if name.split('/', 1)[0] in SERVED and '/' in name else None
+
+
+def _under_served_root(path):
+    real = os.path.realpath(path)
+    return any(
+        real.startswith(os.path.join(os.path.realpath(settings.MEDIA_ROOT), root) + os.sep) for root in SERVED
+    )
+
+
+def can_access(user, name):
+    """
+    Staff and teachers see every material and submission; students see the
+    materials of their cohort (or college-wide ones) and only their own
+    submissions. Anything else under MEDIA_ROOT (e.g. the face index) is
+    never served.
+    """
+    name = clean_name(name)
+    if name is None:
+        return False
+    if name.startswith('materials/'):
+        if user.is_staff or user.is_teacher:
+            return True
+        # Deduplicated uploads can back several materials; any visible one will do.
+        return Material.objects.filter(file=name).filter(
+            Q(branch__isnull=True) | Q(branch=user.branch, semester=user.semester)
+        ).exists()
+    if name.startswith('submissions/'):
+        if user.is_staff or user.is_teacher:
+            return True
+        return AssignmentSubmission.objects.filter(submission_file=name, student=user).exists()
+    return False
+
+
+# --- 2. Responses ---
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single ``bytes=`` range, ``None``
+    to send the whole file, or ``False`` when the range can't be satisfied.
+    Multi-range requests are answered with the whole file, as RFC 9110 allows.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _range_applies(request, etag, mtime):
+    """Honour If-Range: only serve the range if the client's copy is current."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    when = parse_http_date_safe(if_range)
+    return when is not None and when >= int(mtime)
+
+
+def _read_span(path, start, length, chunk_size):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while length > 0:
+            data = fh.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def serve(request, name, as_attachment=False):
+    """Stream MEDIA_ROOT/``name`` honouring conditional and range headers."""
+    config = get_config()
+    name = clean_name(name)
+    if name is None:
+        raise Http404("File not found.")
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        raise Http404("File not found.")
+    if not os.path.isfile(path) or not _under_served_root(path):
+        raise Http404("File not found.")
+
+    size, mtime = stat.st_size, stat.st_mtime
+    etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = http_date(mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+
+    if response is None and config['OFFLOAD']:
+        # The front-end server streams the file (and handles Range itself).
+        response = HttpResponse()
+        if config['OFFLOAD'] == 'accel':
+            response['X-Accel-Redirect'] = config['ACCEL_PREFIX'] + name
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Type'] = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    elif response is None:
+        span = parse_range(request.headers.get('Range'), size) if _range_applies(request, etag, mtime) else None
+        if span is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if span is None:
+            # FileResponse lets the WSGI server use sendfile() where it can.
+            response = FileResponse(open(path, 'rb'), as_attachment=as_attachment,
+                                    filename=os.path.basename(path))
+        else:
+            start, end = span
+            response = StreamingHttpResponse(
+                _read_span(path, start, end - start + 1, config['CHUNK_SIZE']), status=206,
+                content_type=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, private=True, max_age=config['MAX_AGE'])
+    return response
@@ -0,0 +1,43 @@
+import pickle
+import struct
+
+import numpy as np
+from django.db import migrations
+
+# Frozen copy of the v1 layout from core.face_codec, so this migration keeps
+# working even if the codec module changes later.
+HEADER = struct.Struct('<2sBBHH')
+HEADER_BYTES = HEADER.pack(b'FE', 1, 1, 128, 0)
+
+
+def pickle_to_binary(apps, schema_editor):
+    StudentData = apps.get_model('core', 'StudentData')
+    rows = StudentData.objects.exclude(face_encoding__isnull=True).only('face_encoding')
+    for row in rows.iterator():
+        blob = bytes(row.face_encoding)
+        if not blob or blob.startswith(b'FE'):
+            continue
+        vector = np.asarray(pickle.loads(blob), dtype='<f4').reshape(-1)
+        StudentData.objects.filter(pk=row.pk).update(face_encoding=HEADER_BYTES + vector.tobytes())
+
+
+def binary_to_pickle(apps, schema_editor):
+    StudentData = apps.get_model('core', 'StudentData')
+    rows = StudentData.objects.exclude(face_encoding__isnull=True).only('face_encoding')
+    for row in rows.iterator():
+        blob = bytes(row.face_encoding)
+        if not blob.startswith(b'FE'):
+            continue
+        vector = np.frombuffer(blob, dtype='<f4', offset=HEADER.size).astype(np.float64)
+        StudentData.objects.filter(pk=row.pk).update(face_encoding=pickle.dumps(vector))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_material_branch_material_semester_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(pickle_to_binary, binary_to_pickle),
+    ]
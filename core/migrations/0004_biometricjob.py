@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_face_encoding_binary_format'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BiometricJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('enroll', 'Enroll'), ('verify', 'Verify 1:1'), ('identify', 'Identify 1:N')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('applied', 'Applied')], default='pending', max_length=10)),
+                ('session_key', models.CharField(blank=True, max_length=40)),
+                ('frames', models.BinaryField()),
+                ('reference', models.BinaryField(blank=True, null=True)),
+                ('group', models.CharField(blank=True, max_length=16)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_biomet_status_4ed8d5_idx')],
+            },
+        ),
+    ]
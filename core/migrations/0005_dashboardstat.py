@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_biometricjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=40, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_dashboardstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('distance', models.FloatField(blank=True, null=True)),
+                ('rolled_up', models.BooleanField(default=False)),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_events', to='core.livesession')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'student'], name='core_attend_session_5b0ea3_idx'), models.Index(fields=['student', 'recorded_at'], name='core_attend_student_461de4_idx'), models.Index(fields=['session', 'recorded_at'], name='core_attend_session_8e9136_idx'), models.Index(condition=models.Q(('rolled_up', False)), fields=['id'], name='attendance_pending_rollup')],
+            },
+        ),
+    ]
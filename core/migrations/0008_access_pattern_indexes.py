@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0007_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['-submitted_at', '-id'], name='submission_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['student', '-submitted_at'], name='submission_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livesession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at'], name='livesession_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['branch', 'semester', '-uploaded_at'], name='material_cohort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentdata',
+            index=models.Index(condition=models.Q(('face_encoding__isnull', False)), fields=['student'], name='studentdata_enrolled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_student', 'branch', 'semester'], name='user_cohort_idx'),
+        ),
+    ]
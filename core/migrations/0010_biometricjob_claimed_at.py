@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_face_gallery_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biometricjob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 
+from . import performance
+
 # --- 1. Custom User Model ---
 class User(AbstractUser):
     BRANCH_CHOICES = [
@@ -18,10 +20,57 @@ class User(AbstractUser):
     semester = models.IntegerField(choices=SEM_CHOICES, default=1)
     enrollment_number = models.CharField(max_length=20, unique=True, null=True, blank=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [models.Index(fields=['is_student', 'branch', 'semester'], name='user_cohort_idx')]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored cohort, so core.signals can tell whether a save moved the student.
+        instance._saved_cohort = (instance.__dict__.get('branch', models.DEFERRED),
+                                  instance.__dict__.get('semester', models.DEFERRED))
+        return instance
+
     def __str__(self):
         return f"{self.username} ({self.branch} - Sem {self.semester})"
 
 # --- 2. Student Data & AI Biometrics ---
+def _cohort_q(branch, semester):
+    cohort = models.Q(student__branch=branch)
+    if semester is not None:
+        cohort &= models.Q(student__semester=semester)
+    return cohort
+
+
+class StudentDataQuerySet(models.QuerySet):
+    def with_band(self):
+        """Annotate ``band``: the performance band the current thresholds give."""
+        whens = []
+        for branch, semester, bands in performance.overrides():
+            cohort = _cohort_q(branch, semester)
+            whens += [models.When(cohort & models.Q(marks__gte=minimum), then=models.Value(band))
+                      for minimum, band in bands]
+            whens.append(models.When(cohort, then=models.Value(performance.FLOOR)))
+        default = performance.band_expression(performance.bands_for())
+        return self.annotate(band=models.Case(*whens, default=default) if whens else default)
+
+    def recompute_performance(self):
+        """
+        Store the band for every row whose ``performance`` is stale, with one
+        UPDATE per configured threshold override plus one for the rest.
+        Returns the number of rows changed.
+        """
+        changed, remaining = 0, self
+        for branch, semester, bands in performance.overrides():
+            cohort = _cohort_q(branch, semester)
+            expression = performance.band_expression(bands)
+            changed += remaining.filter(cohort).exclude(performance=expression).update(performance=expression)
+            remaining = remaining.exclude(cohort)
+        expression = performance.band_expression(performance.bands_for())
+        changed += remaining.exclude(performance=expression).update(performance=expression)
+        return changed
+
+
 class StudentData(models.Model):
     student = models.OneToOneField(
         settings.AUTH_USER_MODEL, 
@@ -35,17 +84,23 @@ class StudentData(models.Model):
     performance_summary = models.TextField(null=True, blank=True)
     is_active = models.BooleanField(default=True) # Tracks if student is still in college
 
-    def save(self, *args, **kwargs):
-        # Automated Performance Logic
-        if self.marks >= 80:
-            self.performance = "Excellent"
-        elif self.marks >= 60:
-            self.performance = "Good"
-        elif self.marks >= 40:
-            self.performance = "Average"
-        else:
-            self.performance = "Poor"
-        super(StudentData, self).save(*args, **kwargs)
+    # performance is derived from marks (see core.performance); single saves
+    # are banded in core.signals, bulk paths call recompute_performance().
+    objects = StudentDataQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored encoding, so core.signals can tell whether a save changed it.
+        instance._saved_face_encoding = instance.__dict__.get('face_encoding', models.DEFERRED)
+        return instance
+
+    class Meta:
+        indexes = [
+            # Only enrolled faces: gallery loads and registration counts
+            models.Index(fields=['student'], condition=models.Q(face_encoding__isnull=False),
+                         name='studentdata_enrolled_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.enrollment_number} - Sem {self.student.semester}"
@@ -61,6 +116,9 @@ class Material(models.Model):
     teacher = models.ForeignKey(User, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['branch', 'semester', '-uploaded_at'], name='material_cohort_idx')]
+
     def __str__(self):
         return f"{self.title} ({self.branch} Sem {self.semester})"
 
@@ -71,6 +129,12 @@ class AssignmentSubmission(models.Model):
     submission_file = models.FileField(upload_to='submissions/')
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-submitted_at', '-id'], name='submission_recent_idx'),
+            models.Index(fields=['student', '-submitted_at'], name='submission_student_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.username} - {self.assignment_name}"
 
@@ -81,5 +145,136 @@ class LiveSession(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['created_at'], condition=models.Q(is_active=True),
+                                name='livesession_active_idx')]
+
+    def __str__(self):
+        return self.title
+
+# --- 6. Biometric Job Queue ---
+class BiometricJob(models.Model):
+    """A unit of face work handed from the web process to biometric workers."""
+    ENROLL = 'enroll'
+    VERIFY = 'verify'
+    IDENTIFY = 'identify'
+    KIND_CHOICES = [
+        (ENROLL, 'Enroll'),
+        (VERIFY, 'Verify 1:1'),
+        (IDENTIFY, 'Identify 1:N'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    APPLIED = 'applied'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+        (APPLIED, 'Applied'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    session_key = models.CharField(max_length=40, blank=True)
+    frames = models.BinaryField()
+    reference = models.BinaryField(null=True, blank=True)  # stored encoding for 1:1
+    group = models.CharField(max_length=16, blank=True)    # cohort hint for 1:N
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # worker lease, see biometric_jobs.purge
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+# --- 7. Dashboard Statistics ---
+class DashboardStat(models.Model):
+    """One precomputed dashboard counter, kept current by core.signals."""
+    key = models.CharField(max_length=40, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+# --- 8. Attendance Ledger ---
+class AttendanceEvent(models.Model):
+    """
+    One verified class attendance. Rows are append-only; core.attendance rolls
+    them up into StudentData.attendance and flags them once counted.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_events')
+    session = models.ForeignKey(LiveSession, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='attendance_events')
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    distance = models.FloatField(null=True, blank=True)  # face match distance
+    rolled_up = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['session', 'student']),
+            models.Index(fields=['student', 'recorded_at']),
+            models.Index(fields=['session', 'recorded_at']),
+            models.Index(fields=['id'], condition=models.Q(rolled_up=False), name='attendance_pending_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} @ {self.session_id} ({self.recorded_at:%Y-%m-%d %H:%M})"
+
+# --- 9. Chunked Uploads ---
+class UploadSession(models.Model):
+    """A resumable upload; chunks are written straight into a .part file (see core.uploads)."""
+    SUBMISSION = 'submission'
+    MATERIAL = 'material'
+    PURPOSE_CHOICES = [
+        (SUBMISSION, 'Assignment submission'),
+        (MATERIAL, 'Study material'),
+    ]
+
+    token = models.UUIDField(unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    purpose = models.CharField(max_length=12, choices=PURPOSE_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)  # optional, checked on completion
+    metadata = models.JSONField(default=dict)             # title, branch, assignment_name, ...
+    completed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def __str__(self):
+        return f"{self.filename} ({self.purpose}, {self.user_id})"
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
+        ]
+
+# --- 10. Face Gallery Version ---
+class FaceGalleryState(models.Model):
+    """
+    Single row whose ``version`` moves on with every enrolment change, so each
+    process can tell that its in-memory face gallery is stale (core.gallery).
+    """
+    version = models.BigIntegerField(default=0)
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"face gallery v{self.version}"
@@ -0,0 +1,128 @@
+"""
+Keyset (seek) pagination for the staff list views.
+
+Unlike OFFSET paging, each page is fetched with a ``WHERE (key) > (cursor)``
+condition on an indexed ordering, so page 500 costs the same as page 1.
+Cursors are signed so they can't be tampered with in the query string.
+"""
+from django.core import signing
+from django.db.models import Q
+from django.utils.http import urlencode
+
+CURSOR_SALT = 'core.pagination'
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor, params):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _query(self, **cursor):
+        params = {k: v for k, v in self._params.items() if k not in ('after', 'before') and v}
+        params.update(cursor)
+        return urlencode(params)
+
+    @property
+    def next_query(self):
+        return self._query(after=self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query(before=self.previous_cursor)
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` on ``ordering`` (e.g. ``('-submitted_at', '-id')``);
+    the last key must be unique, normally the primary key.
+    """
+
+    def __init__(self, queryset, ordering, per_page=50):
+        self.queryset = queryset
+        self.ordering = [(key.lstrip('-'), key.startswith('-')) for key in ordering]
+        self.per_page = per_page
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field, _ in self.ordering]
+
+    def _encode(self, obj):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in self._key(obj)]
+        return signing.dumps(values, salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            values = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        meta = self.queryset.model._meta
+        return [meta.get_field(field).to_python(value) for (field, _), value in zip(self.ordering, values)]
+
+    def _seek(self, values, forward):
+        """Q() selecting rows strictly after (or before) ``values`` in key order."""
+        condition = Q(pk__in=[])
+        for i, (field, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[i]})
+            for j, (prev_field, _) in enumerate(self.ordering[:i]):
+                step &= Q(**{prev_field: values[j]})
+            condition |= step
+        return condition
+
+    def _order_by(self, forward):
+        return [
+            f"{'-' if descending == forward else ''}{field}" for field, descending in self.ordering
+        ]
+
+    def _window(self, params):
+        """The queryset for the requested page plus what ``_page`` needs to finish it."""
+        after = self._decode(params.get('after')) if params.get('after') else None
+        before = self._decode(params.get('before')) if params.get('before') else None
+        forward = before is None
+        queryset = self.queryset.order_by(*self._order_by(forward))
+        if after is not None:
+            queryset = queryset.filter(self._seek(after, True))
+        elif before is not None:
+            queryset = queryset.filter(self._seek(before, False))
+        return queryset[:self.per_page + 1], after, forward
+
+    def _page(self, rows, after, forward, params):
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            next_cursor = self._encode(rows[-1]) if more else None
+            previous_cursor = self._encode(rows[0]) if after is not None and rows else None
+        else:
+            next_cursor = self._encode(rows[-1]) if rows else None
+            previous_cursor = self._encode(rows[0]) if more else None
+        return KeysetPage(rows, next_cursor, previous_cursor, {k: params.get(k) for k in params})
+
+    def page(self, params):
+        """Build the page selected by the ``after``/``before`` cursors in ``params``."""
+        queryset, after, forward = self._window(params)
+        return self._page(list(queryset), after, forward, params)
+
+    async def apage(self, params):
+        """``page()`` for async views."""
+        queryset, after, forward = self._window(params)
+        return self._page([obj async for obj in queryset], after, forward, params)
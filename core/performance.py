@@ -0,0 +1,61 @@
+"""
+Performance bands (Excellent / Good / Average / Poor) from marks.
+
+Thresholds come from ``settings.PERFORMANCE_BANDS``: a ``'default'`` list of
+``(minimum marks, band)`` pairs, best first, optionally overridden for a
+branch (``'CE'``) or one cohort (``'CE:3'``). Marks below every threshold
+fall into ``FLOOR``. The same rules are available in Python (``band_for``)
+and as SQL (``band_expression``) so single saves and set-based updates
+(``StudentData.objects.recompute_performance()``) always agree.
+"""
+from django.conf import settings
+from django.db.models import Case, Value, When
+
+FLOOR = "Poor"
+DEFAULT_BANDS = [(80, "Excellent"), (60, "Good"), (40, "Average")]
+
+
+def get_config():
+    config = {'default': DEFAULT_BANDS, **getattr(settings, 'PERFORMANCE_BANDS', {})}
+    return {key: sorted(bands, reverse=True) for key, bands in config.items()}
+
+
+def bands_for(branch=None, semester=None, config=None):
+    config = config or get_config()
+    return config.get(f'{branch}:{semester}') or config.get(branch or '') or config['default']
+
+
+def band_for(marks, branch=None, semester=None):
+    return next(
+        (band for minimum, band in bands_for(branch, semester) if marks >= minimum), FLOOR
+    )
+
+
+def band_names():
+    """Every band any configuration can produce, best first."""
+    names = []
+    for bands in get_config().values():
+        names += [band for _, band in bands if band not in names]
+    return names + [FLOOR]
+
+
+def band_expression(bands):
+    return Case(
+        *[When(marks__gte=minimum, then=Value(band)) for minimum, band in bands],
+        default=Value(FLOOR),
+    )
+
+
+def overrides():
+    """
+    ``(branch, semester or None, bands)`` for every configured override,
+    cohort-specific ones before branch-wide ones.
+    """
+    config = get_config()
+    found = []
+    for key, bands in config.items():
+        if key == 'default':
+            continue
+        branch, _, semester = key.partition(':')
+        found.append((branch, int(semester) if semester else None, bands))
+    return sorted(found, key=lambda item: item[1] is None)
@@ -0,0 +1,60 @@
+"""
+Set-based semester promotion.
+
+A whole cohort is promoted with a constant number of statements no matter
+how many students it contains: final-semester students are graduated by
+flipping ``StudentData.is_active`` in bulk, then everyone below the final
+semester moves up with a single ``UPDATE ... SET semester = semester + 1``.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from . import dashboard_stats, fragments
+from .gallery import face_gallery
+from .models import StudentData, User
+
+FINAL_SEMESTER = max(value for value, _ in User.SEM_CHOICES)
+
+
+def cohort(branch=None, semester=None, queryset=None):
+    """Students selected by an optional queryset and branch/semester filter."""
+    students = (queryset if queryset is not None else User.objects.all()).filter(is_student=True)
+    if branch:
+        students = students.filter(branch=branch)
+    if semester:
+        students = students.filter(semester=semester)
+    return students
+
+
+def preview(students):
+    """Return (to_promote, to_graduate) counts without changing anything."""
+    return (
+        students.filter(semester__lt=FINAL_SEMESTER).count(),
+        StudentData.objects.filter(
+            student__in=students.filter(semester=FINAL_SEMESTER), is_active=True
+        ).count(),
+    )
+
+
+def promote(students):
+    """
+    Promote ``students`` (a User queryset) by one semester and graduate those
+    already in the final semester. Returns (promoted, graduated).
+    """
+    with transaction.atomic():
+        # ``students`` is lazy and may filter on semester: fix its members before moving them.
+        pks = list(students.values_list('pk', flat=True))
+        # Graduate first so students promoted into the final semester stay active.
+        graduated = StudentData.objects.filter(
+            student__in=students.filter(semester=FINAL_SEMESTER), is_active=True
+        ).update(is_active=False)
+        promoted = students.filter(semester__lt=FINAL_SEMESTER).update(semester=F('semester') + 1)
+        # Per-semester thresholds may band the promoted students differently.
+        StudentData.objects.filter(student__in=pks).recompute_performance()
+    if promoted:
+        # QuerySet.update() skips the User signals that keep cohort partitions current.
+        face_gallery.invalidate()
+    if promoted or graduated:
+        dashboard_stats.rebuild()
+        fragments.invalidate_roster()
+    return promoted, graduated
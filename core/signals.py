@@ -0,0 +1,172 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import dashboard_stats, fragments, performance, student_portal
+from .face_index import cohort_key
+from .gallery import face_gallery
+from .models import LiveSession, Material, StudentData, User
+
+
+# --- 0. Performance Bands ---
+
+@receiver(pre_save, sender=StudentData)
+def assign_performance_band(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Band single saves with the same thresholds recompute_performance() uses."""
+    if raw or (update_fields is not None and 'performance' not in update_fields):
+        return
+    if StudentData.student.is_cached(instance):
+        cohort = (instance.student.branch, instance.student.semester)
+    else:
+        cohort = User.objects.filter(pk=instance.student_id).values_list('branch', 'semester').first() or (None, None)
+    instance.performance = performance.band_for(instance.marks, *cohort)
+
+
+@receiver(post_save, sender=User)
+def reband_on_cohort_change(sender, instance, created, update_fields=None, **kwargs):
+    """Cohort-specific thresholds may give a moved student another band."""
+    if created or not instance.is_student or not performance.overrides():
+        return
+    if update_fields is not None and not {'branch', 'semester'} & set(update_fields):
+        return
+    profile = StudentData.objects.filter(student=instance).first()
+    if profile is not None:
+        profile.student = instance
+        profile.save(update_fields=['performance'])
+
+
+# --- 1. Face Gallery Maintenance ---
+# Every process's gallery learns of a change through core.gallery's shared
+# version, so only saves that really change an enrolment may move it on.
+
+def _blob(value):
+    return bytes(value) if value else None
+
+
+@receiver(post_save, sender=StudentData)
+def sync_gallery_on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Publish register_face / reset_face_id; saves that keep the encoding are ignored."""
+    if raw or (update_fields is not None and 'face_encoding' not in update_fields):
+        return
+    saved, current = getattr(instance, '_saved_face_encoding', DEFERRED), instance.face_encoding
+    instance._saved_face_encoding = current
+    if (created and not current) or (saved is not DEFERRED and _blob(saved) == _blob(current)):
+        return
+    if current:
+        student = instance.student
+        face_gallery.upsert(instance.student_id, current, cohort_key(student.branch, student.semester))
+    else:
+        face_gallery.remove(instance.student_id)
+
+
+@receiver(post_delete, sender=StudentData)
+def sync_gallery_on_delete(sender, instance, **kwargs):
+    if instance.__dict__.get('face_encoding', True):  # deferred: may have been enrolled
+        face_gallery.remove(instance.student_id)
+
+
+@receiver(post_save, sender=User)
+def sync_gallery_cohort(sender, instance, created, update_fields=None, **kwargs):
+    """Re-partition an enrolled student whose branch or semester changed."""
+    if update_fields is not None and not {'branch', 'semester'} & set(update_fields):
+        return
+    cohort, saved = (instance.branch, instance.semester), getattr(instance, '_saved_cohort', None)
+    instance._saved_cohort = cohort
+    if created or saved == cohort or not instance.is_student:
+        return
+    if StudentData.objects.filter(student=instance, face_encoding__isnull=False).exists():
+        face_gallery.set_group(instance.pk, cohort_key(*cohort))
+
+
+# --- 2. Dashboard Counters ---
+
+STAT_FIELDS = {
+    StudentData: ({'performance', 'attendance', 'face_encoding', 'marks'}, dashboard_stats.stored_student),
+    User: ({'is_student', 'branch', 'semester'}, dashboard_stats.stored_user),
+    LiveSession: ({'is_active'}, dashboard_stats.stored_session),
+}
+
+
+def _tracks(sender, update_fields):
+    fields, _ = STAT_FIELDS[sender]
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(pre_save, sender=StudentData)
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=LiveSession)
+def stats_before_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Skip the lookup for saves that cannot move a counter (e.g. last_login).
+    if raw or not _tracks(sender, update_fields):
+        return
+    _, stored = STAT_FIELDS[sender]
+    instance._stats_before = stored(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=StudentData)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=LiveSession)
+def stats_after_save(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_stats_before'):
+        return
+    _, stored = STAT_FIELDS[sender]
+    before = instance.__dict__.pop('_stats_before')
+    dashboard_stats.apply(before or {}, stored(instance.pk))
+
+
+@receiver(pre_delete, sender=StudentData)
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=LiveSession)
+def stats_before_delete(sender, instance, **kwargs):
+    _, stored = STAT_FIELDS[sender]
+    instance._stats_before = stored(instance.pk)
+
+
+@receiver(post_delete, sender=StudentData)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=LiveSession)
+def stats_after_delete(sender, instance, **kwargs):
+    dashboard_stats.apply(instance.__dict__.pop('_stats_before', {}), {})
+
+
+# --- 3. Student Dashboard Cache ---
+
+@receiver(post_save, sender=StudentData)
+@receiver(post_delete, sender=StudentData)
+def invalidate_student_profile(sender, instance, **kwargs):
+    student_portal.invalidate_profile(instance.student_id)
+
+
+@receiver(post_save, sender=Material)
+def invalidate_materials_on_save(sender, instance, created, **kwargs):
+    if created:
+        student_portal.invalidate_materials(instance.branch, instance.semester)
+    else:
+        # The old cohort is unknown after an edit; drop every cohort's list.
+        student_portal.invalidate_materials(None, None)
+
+
+@receiver(post_delete, sender=Material)
+def invalidate_materials_on_delete(sender, instance, **kwargs):
+    student_portal.invalidate_materials(instance.branch, instance.semester)
+
+
+@receiver(post_save, sender=LiveSession)
+@receiver(post_delete, sender=LiveSession)
+def invalidate_live_session(sender, **kwargs):
+    student_portal.invalidate_live_session()
+
+
+# --- 4. Cached Template Fragments ---
+
+@receiver(post_save, sender=StudentData)
+@receiver(post_delete, sender=StudentData)
+@receiver(post_delete, sender=User)
+def invalidate_roster_on_change(sender, **kwargs):
+    fragments.invalidate_roster()
+
+
+@receiver(post_save, sender=User)
+def invalidate_roster_on_user_save(sender, update_fields=None, **kwargs):
+    if update_fields is None or fragments.ROSTER_USER_FIELDS & set(update_fields):
+        fragments.invalidate_roster()
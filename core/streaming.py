@@ -0,0 +1,28 @@
+"""
+Streamed responses that stay streamed under ASGI.
+
+Django's ASGI handler reads a synchronous ``streaming_content`` into a list
+before sending any of it, so a ZIP export or a large download would sit in
+worker memory whole. ``for_request`` gives ASGI responses an asynchronous
+body that pulls one chunk at a time from the original iterator, each pull
+run thread-sensitively: on the request's own sync thread, where the view
+ran and where any cursor the iterator holds was opened. WSGI responses are
+returned unchanged.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+_DONE = object()
+
+
+async def _pull(iterator):
+    step = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await step(iterator, _DONE)) is not _DONE:
+        yield chunk
+
+
+def for_request(request, response):
+    """Swap a synchronous streaming body for an asynchronous one on ASGI requests."""
+    if isinstance(request, ASGIRequest) and response.streaming and not response.is_async:
+        response.streaming_content = _pull(iter(response.streaming_content))
+    return response
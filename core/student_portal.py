@@ -0,0 +1,133 @@
+"""
+Cached building blocks of the student dashboard.
+
+A warm ``student_dash`` touches the database only for the user (sessions
+come from their own cache). Materials are cached per (branch, semester)
+under versioned keys, the progress numbers per student, and the active live
+session once for everybody. ``core.signals`` invalidates each piece when its rows change.
+The ``a``-prefixed twins serve the async view and load the same cache entries.
+"""
+import asyncio
+
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from . import cache
+from .models import LiveSession, Material, StudentData
+
+ALL_MATERIALS = 'materials'
+
+
+def _cohort_namespace(branch, semester):
+    return f'materials:{branch or "-"}:{semester}'
+
+
+# --- 1. Study materials ---
+
+def materials_key(branch, semester):
+    """Changes whenever the cohort's material list does; also keys its template fragment."""
+    return cache.versioned_key(ALL_MATERIALS, _cohort_namespace(branch, semester), suffix='list')
+
+
+async def amaterials_key(branch, semester):
+    return await cache.aversioned_key(ALL_MATERIALS, _cohort_namespace(branch, semester), suffix='list')
+
+
+def materials_for(branch, semester):
+    """Materials for one cohort plus those posted without a branch (college-wide)."""
+    return cache.get_or_compute(materials_key(branch, semester), lambda: _compute_materials(branch, semester))
+
+
+async def amaterials_for(branch, semester):
+    key = await amaterials_key(branch, semester)
+    return await cache.aget_or_compute(key, lambda: _acompute_materials(branch, semester))
+
+
+def _material_lookups(branch, semester):
+    # Two lookups rather than one OR, so each is a seek on material_cohort_idx.
+    materials = Material.objects.only('title', 'file', 'video_link', 'uploaded_at').order_by('-uploaded_at')
+    lookups = [materials.filter(branch__isnull=True)]
+    if branch:
+        lookups.append(materials.filter(branch=branch, semester=semester))
+    return lookups
+
+
+def _newest_first(materials):
+    return sorted(materials, key=lambda material: material.uploaded_at, reverse=True)
+
+
+def _compute_materials(branch, semester):
+    return _newest_first(material for lookup in _material_lookups(branch, semester) for material in lookup)
+
+
+async def _acompute_materials(branch, semester):
+    async def fetch(lookup):
+        return [material async for material in lookup]
+    found = await asyncio.gather(*map(fetch, _material_lookups(branch, semester)))
+    return _newest_first(material for materials in found for material in materials)
+
+
+def invalidate_materials(branch, semester):
+    if branch:
+        cache.bump_version(_cohort_namespace(branch, semester))
+    else:
+        cache.bump_version(ALL_MATERIALS)
+
+
+# --- 2. Profile & progress ---
+
+def _profile_key(student_id):
+    return f'student_dash:profile:{student_id}'
+
+
+def _profile_values(student_id):
+    return (
+        StudentData.objects.filter(student_id=student_id)
+        .annotate(has_face=ExpressionWrapper(Q(face_encoding__isnull=False), output_field=BooleanField()))
+        .values('attendance', 'marks', 'has_face')
+    )
+
+
+def _profile(data):
+    progress = 25  # Initial progress for account creation
+    if data:
+        if data['has_face']:
+            progress += 35  # Extra for face registration
+        if data['attendance'] > 0:
+            progress += 40  # Extra for attending class
+    return {'data': data, 'progress': min(progress, 100)}
+
+
+def profile_for(student_id):
+    """``{'data': {...} or None, 'progress': int}`` for the dashboard header."""
+    return cache.get_or_compute(_profile_key(student_id), lambda: _profile(_profile_values(student_id).first()))
+
+
+async def aprofile_for(student_id):
+    async def compute():
+        return _profile(await _profile_values(student_id).afirst())
+    return await cache.aget_or_compute(_profile_key(student_id), compute)
+
+
+def invalidate_profile(*student_ids):
+    cache.delete(*[_profile_key(student_id) for student_id in student_ids])
+
+
+# --- 3. Live session ---
+
+LIVE_SESSION_KEY = 'live_session:active'
+
+
+def active_live_session():
+    return cache.get_or_compute(
+        LIVE_SESSION_KEY, lambda: LiveSession.objects.filter(is_active=True).first()
+    )
+
+
+async def aactive_live_session():
+    return await cache.aget_or_compute(
+        LIVE_SESSION_KEY, lambda: LiveSession.objects.filter(is_active=True).afirst()
+    )
+
+
+def invalidate_live_session():
+    cache.delete(LIVE_SESSION_KEY)
@@ -1,3 +1,1282 @@
-from django.test import TestCase
+import base64
+import csv
+import hashlib
+import importlib.util
+import io
+import os
+import pickle
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+import numpy as np
+
+from . import (attendance, biometric_jobs, checks, dashboard_stats, face_codec, gallery, instrumentation, media,
+               promotion, student_portal, uploads)
+from .face_index import FaceIndex, create_index, load_index
+from .models import (AssignmentSubmission, AttendanceEvent, BiometricJob, LiveSession, Material, StudentData,
+                     UploadSession, User)
+
+MEDIA_TEST_ROOT = os.path.join(tempfile.gettempdir(), 'academy-test-media')
+
+
+def random_encoding(seed):
+    return np.random.default_rng(seed).normal(size=128).astype(np.float32)
+
+
+class FaceCodecTests(SimpleTestCase):
+    def test_round_trip(self):
+        vectors = [random_encoding(seed) for seed in range(3)]
+        blobs = [face_codec.encode(vector) for vector in vectors]
+        self.assertEqual(len(blobs[0]), face_codec.RECORD_SIZE)
+        decoded = face_codec.decode(blobs[0])
+        np.testing.assert_array_equal(decoded, vectors[0])
+        self.assertFalse(decoded.flags.writeable)  # a view over the blob, not a copy
+        np.testing.assert_array_equal(face_codec.decode_many(blobs), np.stack(vectors))
+        np.testing.assert_array_equal(face_codec.decode(face_codec.encode(vectors[1].astype(np.float64))), vectors[1])
+
+    def test_rejects_other_formats(self):
+        blob = face_codec.encode(random_encoding(0))
+        legacy = pickle.dumps(random_encoding(0).astype(np.float64))
+        for bad in (b'', blob[:20], blob + b'\0\0\0\0', b'XX' + blob[2:], legacy):
+            with self.subTest(bad=bad[:8]), self.assertRaises(ValueError):
+                face_codec.decode(bad)
+        with self.assertRaises(ValueError):
+            face_codec.decode_many([blob, legacy])
+        with self.assertRaises(ValueError):
+            face_codec.encode(np.zeros(64))
+
+
+class EncodingMigrationTests(TransactionTestCase):
+    """0003 converts pickled float64 encodings to the binary format, and back."""
+
+    before = ('core', '0002_material_branch_material_semester_and_more')
+    after = ('core', '0003_face_encoding_binary_format')
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes('core'))
+
+    def test_forwards_and_backwards(self):
+        vector = random_encoding(0).astype(np.float64)
+        apps = self.migrate(self.before)
+        User, StudentData = apps.get_model('core', 'User'), apps.get_model('core', 'StudentData')
+        enrolled = StudentData.objects.create(student=User.objects.create(username='a'),
+                                              face_encoding=pickle.dumps(vector))
+        StudentData.objects.create(student=User.objects.create(username='b'))
+
+        StudentData = self.migrate(self.after).get_model('core', 'StudentData')
+        blob = bytes(StudentData.objects.get(pk=enrolled.pk).face_encoding)
+        np.testing.assert_array_equal(face_codec.decode(blob), vector.astype(np.float32))
+        self.assertEqual(StudentData.objects.filter(face_encoding__isnull=True).count(), 1)
+
+        StudentData = self.migrate(self.before).get_model('core', 'StudentData')
+        restored = pickle.loads(bytes(StudentData.objects.get(pk=enrolled.pk).face_encoding))
+        np.testing.assert_allclose(restored, vector, rtol=1e-6)
+
+
+class FaceGalleryTests(TestCase):
+    """The web process saves enrolments; a worker's loaded gallery must see them."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path_override = override_settings(FACE_INDEX={**settings.FACE_INDEX, 'PATH': os.path.join(directory, 'g.npz')})
+        path_override.enable()
+        self.addCleanup(path_override.disable)
+        gallery.face_gallery.clear()  # like a web process: never loaded
+        self.student = User.objects.create_user('student', is_student=True, branch='CE', semester=3)
+        self.profile = StudentData.objects.create(student=self.student)
+        self.face = random_encoding(1)
+
+    def test_enrol_and_reset_reach_another_process(self):
+        worker = gallery.FaceGallery()
+        self.assertIsNone(worker.match([self.face]))
+
+        self.profile.face_encoding = face_codec.encode(self.face)
+        self.profile.save()
+        self.assertFalse(gallery.face_gallery.loaded)
+        self.assertEqual(worker.match([self.face])[0], self.student.pk)
+
+        # A restarted worker picks the current version up from disk.
+        self.assertEqual(gallery.FaceGallery().match([self.face])[0], self.student.pk)
+
+        self.profile.face_encoding = None
+        self.profile.save()
+        self.assertIsNone(worker.match([self.face]))
+
+    def test_bad_encodings_are_skipped(self):
+        other = User.objects.create_user('other', is_student=True, branch='CE', semester=3)
+        StudentData.objects.create(student=other, face_encoding=b'not an encoding')
+        self.profile.face_encoding = face_codec.encode(self.face)
+        self.profile.save()
+        with self.assertLogs('core.biometrics', 'WARNING'):
+            self.assertEqual(gallery.FaceGallery().match([self.face])[0], self.student.pk)
+
+    def test_unchanged_encodings_keep_the_version(self):
+        self.profile.face_encoding = face_codec.encode(self.face)
+        self.profile.save()
+        version = gallery.current_version()
+        profile = StudentData.objects.get(pk=self.profile.pk)
+        profile.marks = 70
+        profile.save()
+        self.student.last_name = 'Shah'
+        self.student.save()
+        self.assertEqual(gallery.current_version(), version)
+        self.student.semester = 4
+        self.student.save()
+        self.assertEqual(gallery.current_version(), version + 1)
+
+
+@override_settings(FACE_INDEX={'BACKEND': 'brute', 'PATH': None})
+class FaceMatchingTests(TestCase):
+    """One batched load, one distance computation per burst, the nearest face wins."""
+
+    def setUp(self):
+        gallery.face_gallery.clear()
+        self.addCleanup(gallery.face_gallery.clear)
+
+    def enrol(self, name, encoding):
+        student = User.objects.create_user(name, is_student=True, branch='CE', semester=3)
+        StudentData.objects.create(student=student, face_encoding=face_codec.encode(encoding))
+        return student
+
+    def face(self, offset):
+        encoding = np.zeros(128, dtype=np.float32)
+        encoding[0] = offset
+        return encoding
+
+    def test_nearest_face_wins_across_the_burst(self):
+        first = self.enrol('first', self.face(0.0))
+        second = self.enrol('second', self.face(0.3))
+        # Both are within tolerance; the closer one is chosen, not the first enrolled.
+        match = gallery.face_gallery.match([self.face(0.25)], tolerance=0.5)
+        self.assertEqual(match[0], second.pk)
+        self.assertAlmostEqual(match[1], 0.05, places=5)
+        match = gallery.face_gallery.match([self.face(3.0), self.face(0.02)], tolerance=0.5)
+        self.assertEqual(match[0], first.pk)
+        self.assertIsNone(gallery.face_gallery.match([self.face(3.0)], tolerance=0.5))
+        self.assertIsNone(gallery.face_gallery.match([], tolerance=0.5))
+
+    def test_loading_does_not_query_per_student(self):
+        for i in range(3):
+            self.enrol(f'small{i}', random_encoding(i))
+        with CaptureQueriesContext(connection) as small:
+            gallery.FaceGallery().load()
+        for i in range(30):
+            self.enrol(f'large{i}', random_encoding(100 + i))
+        with CaptureQueriesContext(connection) as large:
+            loaded = gallery.FaceGallery()
+            loaded.load()
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(loaded), 33)
+        with self.assertNumQueries(1):  # the shared version only
+            loaded.match([random_encoding(105)])
+
+    def test_register_face_and_reset_update_the_loaded_gallery(self):
+        student = User.objects.create_user('student', is_student=True, branch='CE', semester=3)
+        StudentData.objects.create(student=student)
+        face = self.face(0.1)
+        gallery.face_gallery.load()
+        self.client.force_login(student)
+        job = BiometricJob.objects.create(
+            kind=BiometricJob.ENROLL, status=BiometricJob.DONE, frames=b'', user=student,
+            session_key=self.client.session.session_key,
+            result={'success': True, 'encoding': base64.b64encode(face_codec.encode(face)).decode(), 'timings': {}},
+        )
+        self.assertTrue(self.client.get(reverse('biometric_job_status', args=[job.id])).json()['success'])
+        self.assertEqual(gallery.face_gallery.match([face])[0], student.pk)
+
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        self.client.get(reverse('reset_face_id', args=[student.profile.pk]))
+        self.assertIsNone(gallery.face_gallery.match([face]))
+
+
+@override_settings(BIOMETRICS={'MAX_FRAMES': 3, 'MAX_FRAME_BYTES': 64, 'QUEUE_DEPTH': 2})
+class FrameUploadTests(TestCase):
+    JPEG = b'\xff\xd8\xff\xe0 frame'
+
+    def post(self, *frames):
+        uploads = [SimpleUploadedFile(f'{i}.jpg', data, content_type='image/jpeg') for i, data in enumerate(frames)]
+        return self.client.post(reverse('face_login'), {'frames': uploads})
+
+    def test_a_valid_burst_is_queued(self):
+        response = self.post(self.JPEG, b'\x89PNG\r\n\x1a\n frame')
+        self.assertEqual(response.status_code, 202)
+        job = BiometricJob.objects.get()
+        self.assertEqual(biometric_jobs.unpack_frames(job.frames), [self.JPEG, b'\x89PNG\r\n\x1a\n frame'])
+        self.assertEqual(response.json()['poll'], reverse('biometric_job_status', args=[job.id]))
+
+    def test_invalid_bursts_are_rejected(self):
+        for name, frames, error in [
+            ('none', [], "No frames were uploaded."),
+            ('too many', [self.JPEG] * 4, "At most 3 frames per request."),
+            ('too large', [self.JPEG + b'x' * 64], "Frame is too large."),
+            ('empty', [self.JPEG, b''], "Frame is empty."),
+            ('not an image', [b'GIF89a frame'], "Frames must be JPEG or PNG images."),
+        ]:
+            with self.subTest(name):
+                response = self.post(*frames)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], error)
+        self.assertFalse(BiometricJob.objects.exists())
+
+    def test_full_queue_answers_busy(self):
+        for _ in range(2):
+            self.assertEqual(self.post(self.JPEG).status_code, 202)
+        response = self.post(self.JPEG)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(BiometricJob.objects.count(), 2)
+
+
+class BiometricJobTests(TestCase):
+    def job(self, status, age=0, **fields):
+        job = BiometricJob.objects.create(kind=BiometricJob.IDENTIFY, status=status, frames=b'', **fields)
+        then = timezone.now() - timedelta(seconds=age)
+        BiometricJob.objects.filter(pk=job.pk).update(
+            created_at=then, claimed_at=then if status != BiometricJob.PENDING else None,
+            finished_at=then if status in (BiometricJob.DONE, BiometricJob.FAILED, BiometricJob.APPLIED) else None,
+        )
+        return job
+
+    def test_purge_keeps_live_jobs(self):
+        for status in (BiometricJob.PENDING, BiometricJob.DONE, BiometricJob.APPLIED):
+            self.job(status, age=3600)
+            self.job(status, age=60)
+        self.assertEqual(biometric_jobs.purge(ttl=600), 3)
+        self.assertEqual(sorted(BiometricJob.objects.values_list('status', flat=True)),
+                         [BiometricJob.APPLIED, BiometricJob.DONE, BiometricJob.PENDING])
+
+    def test_lapsed_lease_is_failed_and_frees_the_queue(self):
+        stuck = [self.job(BiometricJob.RUNNING, age=3600) for _ in range(2)]
+        live = self.job(BiometricJob.RUNNING, age=60)
+        frame = SimpleUploadedFile('f.jpg', b'\xff\xd8\xff frame', content_type='image/jpeg')
+        with override_settings(BIOMETRICS={'QUEUE_DEPTH': 2, 'JOB_TTL': 600}):
+            # Stuck jobs don't count toward the backlog even before a purge.
+            self.assertEqual(self.client.post(reverse('face_login'), {'frames': frame}).status_code, 202)
+            frame.seek(0)
+            self.assertEqual(self.client.post(reverse('face_login'), {'frames': frame}).status_code, 503)
+            biometric_jobs.purge()
+        for job in stuck:
+            job.refresh_from_db()
+            self.assertEqual(job.status, BiometricJob.FAILED)
+        live.refresh_from_db()
+        self.assertEqual(live.status, BiometricJob.RUNNING)
+
+    def test_worker_restarts_a_broken_pool(self):
+        jobs = [self.job(BiometricJob.PENDING) for _ in range(3)]
+        pools = []
+
+        class Pool:
+            def __init__(self, **kwargs):
+                self.broken = not pools  # the first pool loses a process on its second job
+                self.submitted = 0
+                pools.append(self)
+
+            def submit(self, fn, *args):
+                self.submitted += 1
+                future = Future()
+                if self.broken and self.submitted > 1:
+                    raise BrokenProcessPool("A child process terminated abruptly.")
+                future.set_result({'success': False, 'timings': {}})
+                return future
+
+            def shutdown(self, **kwargs):
+                pass
+
+        command = 'core.management.commands.biometric_worker'
+        with mock.patch(f'{command}.ProcessPoolExecutor', Pool), mock.patch(f'{command}.signal.signal'):
+            call_command('biometric_worker', workers=2, once=True, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(len(pools), 2)
+        statuses = [BiometricJob.objects.get(pk=job.pk).status for job in jobs]
+        self.assertEqual(statuses, [BiometricJob.DONE] * 3)
+
+    def test_identify_of_a_deleted_student_fails_cleanly(self):
+        job = BiometricJob.objects.create(
+            kind=BiometricJob.IDENTIFY, status=BiometricJob.DONE, frames=b'',
+            session_key=self.client.session.session_key,
+            result={'success': True, 'student_id': 999, 'distance': 0.1, 'timings': {}},
+        )
+        response = self.client.get(reverse('biometric_job_status', args=[job.id]))
+        self.assertEqual(response.json()['success'], False)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class DetectionPipelineTests(SimpleTestCase):
+    """The pipeline's geometry and gating, with dlib's detector replaced by a mock."""
+
+    def setUp(self):
+        self.detector = mock.Mock()
+        self.detector.face_encodings.side_effect = lambda frame, boxes: [np.zeros(128) for _ in boxes]
+        with mock.patch.dict(sys.modules, {'face_recognition': self.detector}):
+            self.module = importlib.import_module('core.face_pipeline')
+        patcher = mock.patch.object(self.module, 'face_recognition', self.detector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pipeline(self, **options):
+        return self.module.DetectionPipeline(self.module.PipelineConfig(**options))
+
+    def frame(self, seed=0, size=240):
+        return np.random.default_rng(seed).integers(0, 256, (size, size, 3), dtype=np.uint8)
+
+    def test_boxes_found_on_the_small_frame_are_scaled_back(self):
+        self.detector.face_locations.return_value = [(10, 60, 50, 20)]
+        pipeline = self.pipeline(detect_scale=0.25)
+        pipeline.process(self.frame())
+        small = self.detector.face_locations.call_args.args[0]
+        self.assertEqual(small.shape[:2], (60, 60))
+        self.assertEqual(pipeline._boxes, [(40, 240, 200, 80)])
+
+    def test_detects_every_nth_frame_and_tracks_in_between(self):
+        self.detector.face_locations.return_value = [(20, 80, 80, 20)]
+        pipeline = self.pipeline(detect_every=3, min_face_size=0)
+        frame = self.frame()
+        for _ in range(6):
+            pipeline.process(frame)
+        self.assertEqual(self.detector.face_locations.call_count, 2)  # frames 0 and 3
+        self.assertEqual(pipeline.result.detections, 2)
+        self.assertIn('track', pipeline.result.timings)
+
+    def test_redetects_while_nothing_is_tracked(self):
+        self.detector.face_locations.return_value = []
+        pipeline = self.pipeline(detect_every=5)
+        for _ in range(3):
+            pipeline.process(self.frame())
+        self.assertEqual(self.detector.face_locations.call_count, 3)
+
+    def test_tracking_follows_a_moving_face(self):
+        self.detector.face_locations.return_value = [(20, 80, 80, 20)]
+        pipeline = self.pipeline(detect_every=10)
+        frame = self.frame()
+        pipeline.process(frame)
+        pipeline.process(np.roll(frame, (8, 12), axis=(0, 1)))  # 4 and 6 pixels on the small frame
+        self.assertEqual(pipeline._boxes, [(48, 172, 168, 52)])
+
+    def test_encodes_only_a_stable_face(self):
+        self.detector.face_locations.return_value = [(20, 80, 80, 20)]
+        pipeline = self.pipeline(detect_every=1, stable_frames=3, min_face_size=0)
+        encoded = [len(pipeline.process(self.frame())) for _ in range(4)]
+        self.assertEqual(encoded, [0, 0, 1, 1])
+        self.assertTrue(pipeline.done)
+
+    def test_rejects_a_moving_face(self):
+        boxes = iter([[(20, 80, 80, 20)], [(20, 110, 80, 50)]] * 3)
+        self.detector.face_locations.side_effect = lambda *args, **kwargs: next(boxes)
+        pipeline = self.pipeline(detect_every=1, stable_frames=2, min_face_size=0)
+        for _ in range(6):
+            self.assertEqual(pipeline.process(self.frame()), [])
+        self.detector.face_encodings.assert_not_called()
+
+    def test_rejects_a_face_that_is_too_small(self):
+        self.detector.face_locations.return_value = [(20, 50, 50, 20)]  # 60 pixels tall at full size
+        pipeline = self.pipeline(detect_every=1, stable_frames=1, min_face_size=80)
+        for _ in range(3):
+            self.assertEqual(pipeline.process(self.frame()), [])
+        self.detector.face_encodings.assert_not_called()
+
+
+class FaceIndexTests(SimpleTestCase):
+    BACKENDS = [('brute', {}), ('ivf', {'nlist': 4, 'nprobe': 4, 'min_partition_size': 8})]
+
+    def test_add_remove_persist_and_group_filter(self):
+        vectors = np.stack([random_encoding(seed) for seed in range(40)])
+        ids = list(range(1, 41))
+        groups = ['CE:1' if i % 2 else 'IT:1' for i in ids]
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for backend, options in self.BACKENDS:
+            with self.subTest(backend=backend):
+                index = create_index(backend, **options)
+                index.build(ids, vectors, groups)
+                [[(hit, distance)]] = index.query(vectors[4:5])
+                self.assertEqual((hit, round(distance, 3)), (5, 0))
+                [[(hit, _)]] = index.query(vectors[4:5], group='IT:1')
+                self.assertEqual(groups[hit - 1], 'IT:1')
+                self.assertEqual(index.query(vectors[:1], group='IT:8'), [[]])
+
+                index.add(99, random_encoding(99), 'IT:1')
+                index.remove(5)
+                self.assertEqual(len(index), 40)
+                self.assertEqual(index.query([random_encoding(99)])[0][0][0], 99)
+                self.assertNotEqual(index.query(vectors[4:5])[0][0][0], 5)
+
+                path = os.path.join(directory, f'{backend}.npz')
+                index.version = 7
+                index.save(path)
+                loaded = load_index(path, backend, **options)
+                self.assertEqual((loaded.version, len(loaded)), (7, 40))
+                self.assertEqual(loaded.query(vectors), index.query(vectors))
+                with self.assertRaises(ValueError):
+                    load_index(path, 'ivf' if backend == 'brute' else 'brute')
+
+    def test_base_class_is_abstract(self):
+        with self.assertRaises(TypeError):
+            FaceIndex()
+
+
+@override_settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000, 'SCRYPT_WORK_FACTOR': 2 ** 10})
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', password='pw', enrollment_number='E1', is_student=True)
+
+    def test_enrollment_login_is_one_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'enrollment': 'E1', 'password': 'pw'})
+        user_reads = [q for q in queries.captured_queries if q['sql'].startswith('SELECT') and 'FROM "core_user"' in q['sql']]
+        self.assertEqual(len(user_reads), 1)
+        self.assertRedirects(response, reverse('student_dash'), fetch_redirect_response=False)
+        response = self.client.post(reverse('login'), {'enrollment': 'E2', 'password': 'pw'})
+        self.assertEqual([str(m) for m in response.context['messages']], ['Invalid credentials'])
+
+    def test_rehash_on_login(self):
+        with self.settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 2000}):
+            self.assertTrue(self.client.login(username='student', password='pw'))
+        self.student.refresh_from_db()
+        self.assertTrue(self.student.password.startswith('pbkdf2_sha256$2000$'))
+
+        with self.settings(PASSWORD_HASHERS=['core.hashers.TunedScryptPasswordHasher',
+                                             'core.hashers.TunedPBKDF2PasswordHasher']):
+            self.assertTrue(self.client.login(enrollment='E1', password='pw'))
+            self.student.refresh_from_db()
+            self.assertTrue(self.student.password.startswith('scrypt$1024$'))
+            self.assertTrue(self.client.login(enrollment='E1', password='pw'))
+
+
+@override_settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000})
+class ImportStudentsTests(TestCase):
+    def write_sheet(self, rows):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'students.csv')
+        with open(path, 'w', newline='') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(['username', 'enrollment_number', 'email', 'password', 'branch', 'semester'])
+            writer.writerows(rows)
+        return path
+
+    def import_sheet(self, rows, **options):
+        err = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_students', self.write_sheet(rows), hash_workers=1,
+                         stdout=io.StringIO(), stderr=err, **options)
+        return len(queries), err.getvalue()
+
+    def rows(self, start, stop, branch='ce'):
+        return [[f'Student {i}', f'E{i}', f's{i}@example.com', f'pw{i}', branch, '3'] for i in range(start, stop)]
+
+    def test_bulk_import(self):
+        User.objects.create_user('E1', enrollment_number='E1', is_student=True)
+        rows = self.rows(1, 6) + [['Nobody', 'E99', 'n@example.com', 'pw', 'XX', '3']]
+        self.import_sheet(rows, dry_run=True)
+        self.assertEqual(User.objects.count(), 1)
+
+        _, errors = self.import_sheet(rows, batch_size=2)
+        self.assertIn("Row 7: unknown branch 'XX'", errors)
+        imported = User.objects.filter(username__in=['E2', 'E3', 'E4', 'E5'])
+        self.assertEqual(imported.count(), 4)
+        self.assertTrue(imported.get(username='E4').check_password('pw4'))
+        self.assertEqual(StudentData.objects.filter(student__in=imported, student__branch='CE').count(), 4)
+        # The counters bulk_create skipped are rebuilt.
+        self.assertEqual(dashboard_stats.snapshot()['cohort:CE:3'], 4)
+        self.assertEqual(dashboard_stats.snapshot()['students'], 4)
+
+    def test_queries_per_batch_not_per_student(self):
+        small, _ = self.import_sheet(self.rows(10, 12))
+        large, _ = self.import_sheet(self.rows(20, 40, branch='it'))
+        self.assertEqual(small, large)
+        self.assertEqual(User.objects.filter(branch='IT').count(), 20)
+
+
+class PromotionTests(TestCase):
+    def enrol(self, count, semester, branch='CE'):
+        for _ in range(count):
+            n = User.objects.count()
+            user = User.objects.create_user(f'student{n}', is_student=True, branch=branch, semester=semester)
+            StudentData.objects.create(student=user, marks=50)
+
+    def test_queries_do_not_grow_with_the_cohort(self):
+        self.enrol(3, semester=2, branch='CE')
+        self.enrol(30, semester=2, branch='IT')
+        gallery.bump_version()  # create the version row up front
+        with CaptureQueriesContext(connection) as small:
+            promotion.promote(promotion.cohort(branch='CE', semester=2))
+        with CaptureQueriesContext(connection) as large:
+            promotion.promote(promotion.cohort(branch='IT', semester=2))
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(User.objects.filter(semester=3).count(), 33)
+
+    def test_final_semester_graduates(self):
+        self.enrol(2, semester=promotion.FINAL_SEMESTER)
+        self.enrol(3, semester=promotion.FINAL_SEMESTER - 1)
+        self.assertEqual(promotion.promote(promotion.cohort(branch='CE')), (3, 2))
+        final = StudentData.objects.filter(student__semester=promotion.FINAL_SEMESTER)
+        self.assertEqual((final.filter(is_active=True).count(), final.filter(is_active=False).count()), (3, 2))
+        self.assertEqual(dashboard_stats.snapshot()[f'cohort:CE:{promotion.FINAL_SEMESTER}'], 5)
+
+    @override_settings(PERFORMANCE_BANDS={'CE:3': [(50, "Excellent")]})
+    def test_promoted_students_are_rebanded(self):
+        self.enrol(2, semester=2)
+        self.enrol(1, semester=3)
+        promotion.promote(promotion.cohort(branch='CE', semester=2))
+        bands = StudentData.objects.filter(student__semester=3).values_list('performance', flat=True)
+        self.assertEqual(list(bands), ["Excellent"] * 3)
+
+
+class SessionSweepTests(TestCase):
+    def test_sweep_deletes_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'old{i}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+        out = io.StringIO()
+        call_command('sweep_sessions', batch_size=2, pause=0, stdout=out)
+        self.assertIn('Deleted 5 expired sessions', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+    def test_engines_without_a_table_are_not_swept(self):
+        for engine, message in [('signed_cookies', 'client-side'), ('cache', 'expire on their own')]:
+            out = io.StringIO()
+            with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{engine}'):
+                call_command('sweep_sessions', stdout=out)
+            self.assertIn(message, out.getvalue())
+
+
+class ListViewQueryCountTests(TestCase):
+    """The staff list views must issue a fixed number of queries per page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pw', is_teacher=True, is_staff=True)
+
+    def add_students(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(
+                f'student{i}', enrollment_number=f'E{i}', is_student=True, branch='CE', semester=3,
+            )
+            StudentData.objects.create(student=user, face_encoding=b'x' if i % 2 else None)
+            AssignmentSubmission.objects.create(
+                student=user, assignment_name='Lab 1', submission_file=f'submissions/{i}.pdf',
+            )
+
+    def assertConstantQueries(self, url, expected):
+        self.client.force_login(self.teacher)
+        self.add_students(3)
+        with self.assertNumQueries(expected):
+            self.client.get(url)
+        self.add_students(20)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_teacher_dash(self):
+        # session, user, one page of the roster
+        self.assertConstantQueries(reverse('teacher_dash'), 3)
+
+    def test_admin_dashboard(self):
+        # session, user, dashboard counters, one page of the roster
+        self.assertConstantQueries(reverse('admin_dashboard'), 4)
+
+    def test_view_submissions(self):
+        # session, user, one page of submissions
+        response = self.assertConstantQueries(reverse('view_submissions'), 3)
+        self.assertContains(response, 'student1')
+
+    def test_keyset_pages_do_not_overlap(self):
+        self.client.force_login(self.teacher)
+        self.add_students(120)
+        first = self.client.get(reverse('teacher_dash'))
+        page = first.context['students']
+        self.assertTrue(page.has_next)
+        second = self.client.get(reverse('teacher_dash') + '?' + page.next_query)
+        first_ids = {item.id for item in page}
+        second_ids = {item.id for item in second.context['students']}
+        self.assertEqual(len(first_ids), 50)
+        self.assertFalse(first_ids & second_ids)
+        back = self.client.get(reverse('teacher_dash') + '?' + second.context['students'].previous_query)
+        self.assertEqual({item.id for item in back.context['students']}, first_ids)
+
+    def test_cohort_filter(self):
+        self.client.force_login(self.teacher)
+        self.add_students(2)
+        other = User.objects.create_user('it-student', is_student=True, branch='IT', semester=5)
+        StudentData.objects.create(student=other)
+        response = self.client.get(reverse('teacher_dash'), {'branch': 'IT', 'semester': '5'})
+        self.assertEqual([item.student.username for item in response.context['students']], ['it-student'])
+
+
+class StudentDashCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pw', is_teacher=True)
+        cls.student = User.objects.create_user('student', is_student=True, branch='CE', semester=3)
+        StudentData.objects.create(student=cls.student, attendance=2)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def material_titles(self):
+        return [item.title for item in self.client.get(reverse('student_dash')).context['materials']]
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in checks.check_shared_cache(None)], ['core.W001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                   'LOCATION': 'cache'}}):
+            self.assertEqual(checks.check_shared_cache(None), [])
+
+    def test_deploy_check_wants_shared_session_cache(self):
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'):
+            self.assertEqual([warning.id for warning in checks.check_session_cache(None)], ['core.W002'])
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.assertEqual(checks.check_session_cache(None), [])
+
+    def test_warm_dashboard_skips_the_database(self):
+        self.client.get(reverse('student_dash'))
+        # the session (db engine without a shared cache) and the user only
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('student_dash'))
+        self.assertEqual(response.context['progress'], 65)
+
+    def test_materials_are_scoped_and_invalidated_on_upload(self):
+        Material.objects.create(title='CE3', branch='CE', semester=3, teacher=self.teacher)
+        Material.objects.create(title='IT3', branch='IT', semester=3, teacher=self.teacher)
+        self.assertEqual(self.material_titles(), ['CE3'])
+
+        self.client.force_login(self.teacher)
+        self.client.post(reverse('teacher_dash'), {'title': 'Notice', 'video_url': 'https://example.com/v'})
+        self.client.post(reverse('teacher_dash'), {'title': 'CE3 notes', 'branch': 'CE', 'semester': '3'})
+        self.client.force_login(self.student)
+        self.assertEqual(sorted(self.material_titles()), ['CE3', 'CE3 notes', 'Notice'])
+
+    async def test_async_dashboards_under_asgi(self):
+        await Material.objects.acreate(title='CE3', branch='CE', semester=3, teacher=self.teacher)
+        await self.async_client.aforce_login(self.student)
+        response = await self.async_client.get(reverse('student_dash'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item.title for item in response.context['materials']], ['CE3'])
+        self.assertEqual(response.context['progress'], 65)
+
+        await self.async_client.aforce_login(self.teacher)
+        response = await self.async_client.get(reverse('view_submissions'))
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(reverse('admin_dashboard'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+
+
+class AttendanceLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.session = LiveSession.objects.create(meeting_link='https://meet.example.com/a')
+        cls.students = [
+            User.objects.create_user(f'student{i}', is_student=True, branch='CE', semester=3) for i in range(3)
+        ]
+        for student in cls.students:
+            StudentData.objects.create(student=student, attendance=9)
+
+    def test_record_many_counts_each_event_once(self):
+        first, second, third = self.students
+        attendance.record_many([(first, self.session, 0.3), (first, self.session, 0.4), (second, self.session, 0.2)])
+        attendance.record(third, self.session)
+        self.assertEqual(attendance.rollup(), 0)
+        self.assertEqual(
+            list(StudentData.objects.order_by('student_id').values_list('attendance', flat=True)),
+            [11, 10, 10],
+        )
+        self.assertFalse(AttendanceEvent.objects.filter(rolled_up=False).exists())
+        maintained = {key: value for key, value in dashboard_stats.snapshot().items() if value}
+        rebuilt = {key: value for key, value in dashboard_stats.rebuild().items() if value}
+        self.assertEqual(maintained, rebuilt)
+
+    def test_session_report_is_paginated_without_per_session_queries(self):
+        teacher = User.objects.create_user('teacher', is_teacher=True)
+        self.client.force_login(teacher)
+        attendance.record_many([(student, self.session, None) for student in self.students[:2]])
+
+        def report():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('attendance_report'))
+            return response, len(queries)
+
+        response, few = report()
+        self.assertEqual([(row['attended'], row['enrolled']) for row in response.context['sessions']], [(2, 3)])
+        for i in range(5):
+            LiveSession.objects.create(meeting_link=f'https://meet.example.com/{i}')
+        _, many = report()
+        self.assertEqual(few, many)
+        with mock.patch('core.views.ROSTER_PAGE_SIZE', 4):
+            response, _ = report()
+        self.assertEqual(len(response.context['sessions']), 4)
+        self.assertTrue(response.context['sessions'].has_next)
+
+    def test_reports(self):
+        first = self.students[0]
+        attendance.record_many([(first, self.session, None), (self.students[1], self.session, None)])
+        report = attendance.session_report(self.session)
+        self.assertEqual((report['attended'], report['enrolled']), (2, 3))
+        [row] = attendance.student_report(first)
+        self.assertEqual((row['attended'], row['held'], row['percentage']), (1, 1, 100.0))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST_ROOT)
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', is_teacher=True)
+        cls.owner = User.objects.create_user('owner', is_student=True, branch='CE', semester=3)
+        cls.other = User.objects.create_user('other', is_student=True, branch='IT', semester=3)
+        AssignmentSubmission.objects.create(student=cls.owner, assignment_name='Lab', submission_file='submissions/lab.pdf')
+        Material.objects.create(title='Notes', branch='CE', semester=3, teacher=cls.teacher, file='materials/pdfs/notes.pdf')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('submissions/lab.pdf', 'materials/pdfs/notes.pdf', 'face_index/gallery.npz'):
+            path = os.path.join(MEDIA_TEST_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fh:
+                fh.write(bytes(range(256)) * 4)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_TEST_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_permissions(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get('/media/submissions/lab.pdf').status_code, 404)
+        self.assertEqual(self.client.get('/media/materials/pdfs/notes.pdf').status_code, 404)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get('/media/submissions/lab.pdf').status_code, 200)
+        self.assertEqual(self.client.get('/media/materials/pdfs/notes.pdf').status_code, 200)
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get('/media/face_index/gallery.npz').status_code, 404)
+        self.assertEqual(self.client.get('/media/../config/settings.py').status_code, 404)
+
+    def test_encoded_traversal_is_refused(self):
+        self.client.force_login(self.teacher)
+        for url in ['/media/materials/%2e%2e/face_index/gallery.npz',
+                    '/media/submissions/%2e%2e/face_index/gallery.npz',
+                    '/media/submissions/%2E%2E/%2e%2e/config/settings.py',
+                    '/media/materials/pdfs/..%2f..%2fface_index/gallery.npz',
+                    '/media/materials//etc/passwd']:
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+        self.assertIsNone(media.clean_name('materials/../face_index/gallery.npz'))
+        self.assertEqual(media.clean_name('materials/pdfs/./notes.pdf'), 'materials/pdfs/notes.pdf')
+
+    def test_ranges_and_conditional_get(self):
+        self.client.force_login(self.owner)
+        response = self.client.get('/media/submissions/lab.pdf', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        response = self.client.get('/media/submissions/lab.pdf', HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(252, 256)))
+        response = self.client.get('/media/submissions/lab.pdf', HTTP_RANGE='bytes=4096-')
+        self.assertEqual(response.status_code, 416)
+
+        etag = self.client.get('/media/submissions/lab.pdf')['ETag']
+        self.assertEqual(self.client.get('/media/submissions/lab.pdf', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        stale = self.client.get('/media/submissions/lab.pdf', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+    async def test_asgi_downloads_are_streamed_asynchronously(self):
+        await self.async_client.aforce_login(self.owner)
+        for headers, body in [({}, bytes(range(256)) * 4), ({'Range': 'bytes=10-19'}, bytes(range(10, 20)))]:
+            response = await self.async_client.get('/media/submissions/lab.pdf', headers=headers)
+            self.assertTrue(response.is_async)
+            self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), body)
+
+    @override_settings(MEDIA_SERVING={'OFFLOAD': 'accel'})
+    def test_accel_offload(self):
+        self.client.force_login(self.owner)
+        response = self.client.get('/media/submissions/lab.pdf')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/submissions/lab.pdf')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST_ROOT, UPLOADS={'CHUNK_SIZE': 4})
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', is_teacher=True)
+
+    def tearDown(self):
+        shutil.rmtree(MEDIA_TEST_ROOT, ignore_errors=True)
+
+    def upload(self, content, title):
+        response = self.client.post(reverse('upload_start'), {
+            'purpose': 'material', 'filename': 'notes.PDF', 'size': len(content),
+            'title': title, 'branch': 'CE', 'semester': '3',
+        })
+        self.assertEqual(response.status_code, 201)
+        token = response.json()['token']
+        # Out of order, with one retried chunk.
+        for index in reversed(range(response.json()['chunks'])):
+            chunk = content[index * 4:(index + 1) * 4]
+            for _ in range(1 + (index == 0)):
+                response = self.client.put(
+                    reverse('upload_chunk', args=[token, index]), chunk,
+                    content_type='application/octet-stream',
+                    HTTP_X_CHUNK_SHA256=hashlib.sha256(chunk).hexdigest(),
+                )
+                self.assertEqual(response.status_code, 200)
+        return self.client.post(reverse('upload_complete', args=[token]))
+
+    def test_upload_assembles_and_deduplicates(self):
+        self.client.force_login(self.teacher)
+        content = b'%PDF-1.4 lecture notes'
+        self.assertTrue(self.upload(content, 'CE notes').json()['success'])
+        self.assertTrue(self.upload(content, 'IT notes').json()['success'])
+        first, second = Material.objects.order_by('id')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file.name, f'materials/pdfs/{hashlib.sha256(content).hexdigest()[:2]}/'
+                                          f'{hashlib.sha256(content).hexdigest()}.pdf')
+        with first.file.open('rb') as fh:
+            self.assertEqual(fh.read(), content)
+        self.assertEqual(os.listdir(os.path.join(MEDIA_TEST_ROOT, 'upload_parts')), [])
+
+    def test_rejects_bad_chunks_and_limits(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('upload_start'), {'purpose': 'material', 'filename': 'a.pdf', 'size': 8})
+        token = response.json()['token']
+        bad = self.client.put(reverse('upload_chunk', args=[token, 0]), b'abcd',
+                              content_type='application/octet-stream', HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(self.client.post(reverse('upload_complete', args=[token])).status_code, 409)
+        with override_settings(UPLOADS={'MAX_SIZE': {'material': 4, 'submission': 4}}):
+            response = self.client.post(reverse('upload_start'), {'purpose': 'material', 'filename': 'a.pdf', 'size': 8})
+        self.assertEqual(response.status_code, 413)
+        response = self.client.post(reverse('upload_start'), {'purpose': 'submission', 'filename': 'a.pdf', 'size': 8})
+        self.assertEqual(response.status_code, 403)
+
+    def test_concurrent_completes_claim_once(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('upload_start'), {'purpose': 'material', 'filename': 'a.pdf', 'size': 4})
+        token = response.json()['token']
+        self.client.put(reverse('upload_chunk', args=[token, 0]), b'abcd', content_type='application/octet-stream',
+                        HTTP_X_CHUNK_SHA256=hashlib.sha256(b'abcd').hexdigest())
+        # Both requests loaded the session before either completed it.
+        first, second = UploadSession.objects.get(token=token), UploadSession.objects.get(token=token)
+        name = uploads.complete(first)
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.complete(second)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertTrue(os.path.exists(os.path.join(MEDIA_TEST_ROOT, name)))
+
+    def test_failed_complete_releases_the_claim(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('upload_start'), {
+            'purpose': 'material', 'filename': 'a.pdf', 'size': 4, 'sha256': '0' * 64})
+        token = response.json()['token']
+        self.client.put(reverse('upload_chunk', args=[token, 0]), b'abcd', content_type='application/octet-stream',
+                        HTTP_X_CHUNK_SHA256=hashlib.sha256(b'abcd').hexdigest())
+        with self.assertRaises(uploads.UploadError):
+            uploads.complete(UploadSession.objects.get(token=token))
+        self.assertFalse(UploadSession.objects.get(token=token).completed)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST_ROOT)
+class SubmissionExportTests(TestCase):
+    def tearDown(self):
+        shutil.rmtree(MEDIA_TEST_ROOT, ignore_errors=True)
+
+    def test_export_streams_zip_with_manifest(self):
+        teacher = User.objects.create_user('teacher', is_teacher=True)
+        os.makedirs(os.path.join(MEDIA_TEST_ROOT, 'submissions'))
+        for i, branch in enumerate(['CE', 'CE', 'IT']):
+            student = User.objects.create_user(f's{i}', enrollment_number=f'E{i}', is_student=True, branch=branch)
+            with open(os.path.join(MEDIA_TEST_ROOT, 'submissions', f'{i}.pdf'), 'wb') as fh:
+                fh.write(os.urandom(200_000))
+            AssignmentSubmission.objects.create(student=student, assignment_name='Lab 1', submission_file=f'submissions/{i}.pdf')
+        AssignmentSubmission.objects.create(student=student, assignment_name='Lab 1', submission_file='submissions/gone.pdf')
+
+        self.client.force_login(teacher)
+        response = self.client.get(reverse('export_submissions'), {'branch': 'CE', 'assignment': 'Lab 1'})
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        self.assertEqual(sorted(archive.namelist()), ['E0/Lab 1_0.pdf', 'E1/Lab 1_1.pdf', 'manifest.csv'])
+        with open(os.path.join(MEDIA_TEST_ROOT, 'submissions', '1.pdf'), 'rb') as fh:
+            self.assertEqual(archive.read('E1/Lab 1_1.pdf'), fh.read())
+        manifest = list(csv.reader(io.StringIO(archive.read('manifest.csv').decode())))
+        self.assertEqual([row[1] for row in manifest], ['enrollment_number', 'E0', 'E1'])
+
+        response = self.client.get(reverse('export_submissions'), {'branch': 'IT'})
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        manifest = archive.read('manifest.csv').decode()
+        self.assertIn('missing', manifest)
+
+    async def test_asgi_export_is_streamed_asynchronously(self):
+        teacher = await User.objects.acreate(username='teacher', is_teacher=True)
+        student = await User.objects.acreate(username='s0', enrollment_number='E0', is_student=True, branch='CE')
+        os.makedirs(os.path.join(MEDIA_TEST_ROOT, 'submissions'))
+        with open(os.path.join(MEDIA_TEST_ROOT, 'submissions', '0.pdf'), 'wb') as fh:
+            fh.write(os.urandom(200_000))
+        await AssignmentSubmission.objects.acreate(student=student, assignment_name='Lab 1',
+                                                   submission_file='submissions/0.pdf')
+        await self.async_client.aforce_login(teacher)
+        response = await self.async_client.get(reverse('export_submissions'))
+        self.assertTrue(response.is_async)  # not buffered by the ASGI handler
+        archive = zipfile.ZipFile(io.BytesIO(b''.join([chunk async for chunk in response.streaming_content])))
+        self.assertEqual(sorted(archive.namelist()), ['E0/Lab 1_0.pdf', 'manifest.csv'])
+
+
+class BulkGradeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', is_teacher=True)
+        cls.profiles = []
+        for i in range(3):
+            student = User.objects.create_user(f's{i}', enrollment_number=f'E{i}', is_student=True, branch='CE')
+            cls.profiles.append(StudentData.objects.create(student=student, marks=50))
+
+    def post(self, payload):
+        self.client.force_login(self.teacher)
+        return self.client.post(reverse('bulk_update_grades'), payload, content_type='application/json')
+
+    def test_cached_roster_fragment_is_invalidated(self):
+        cache.clear()
+        first = self.profiles[0]
+        self.client.force_login(self.teacher)
+        self.assertContains(self.client.get(reverse('teacher_dash')), 'data-original="50"', count=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post({'rows': [{'id': first.pk, 'marks': 77}]})
+        self.assertContains(self.client.get(reverse('teacher_dash')), 'data-original="77"', count=1)
+        first.refresh_from_db()
+        first.marks = 64
+        first.save()
+        self.assertContains(self.client.get(reverse('teacher_dash')), 'data-original="64"', count=1)
+
+    def test_json_batch_returns_diff(self):
+        first, second, third = self.profiles
+        response = self.post({'rows': [
+            {'id': first.pk, 'marks': 85},
+            {'enrollment_number': 'E1', 'attendance': 12},
+            {'id': third.pk, 'marks': 50},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result['updated'], result['unchanged']), (2, 1))
+        self.assertEqual(result['diff'][0], {
+            'id': first.pk, 'enrollment_number': 'E0', 'marks': [50, 85], 'performance': ['Average', 'Excellent'],
+        })
+        first.refresh_from_db()
+        self.assertEqual((first.marks, first.performance), (85, 'Excellent'))
+        maintained = {key: value for key, value in dashboard_stats.snapshot().items() if value}
+        self.assertEqual(maintained, {key: value for key, value in dashboard_stats.rebuild().items() if value})
+
+    def test_invalid_batch_changes_nothing(self):
+        response = self.post({'rows': [{'id': self.profiles[0].pk, 'marks': 90}, {'enrollment_number': 'nope', 'marks': 10},
+                                       {'id': self.profiles[1].pk, 'marks': 101}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [3])
+        response = self.post({'rows': [{'id': self.profiles[0].pk, 'marks': 90}, {'enrollment_number': 'nope', 'marks': 10}]})
+        self.assertEqual(response.json()['errors'], [{'row': 2, 'error': 'unknown student'}])
+        self.assertFalse(StudentData.objects.filter(marks=90).exists())
+
+    def test_non_finite_values_are_rejected(self):
+        response = self.post({'rows': [{'id': self.profiles[0].pk, 'marks': 'nan'},
+                                       {'id': self.profiles[1].pk, 'attendance': 'inf'},
+                                       {'id': self.profiles[2].pk, 'marks': '1e400'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [1, 2, 3])
+
+    def test_single_update(self):
+        self.client.force_login(self.teacher)
+        self.client.post(reverse('update_marks', args=[self.profiles[0].pk]), {'marks': 66, 'attendance': 3})
+        self.profiles[0].refresh_from_db()
+        self.assertEqual((self.profiles[0].marks, self.profiles[0].attendance), (66, 3))
+        response = self.client.post(reverse('update_marks', args=[0]), {'marks': 66}, follow=True)
+        self.assertIn('unknown student', [str(m) for m in response.context['messages']])
+
+    def test_single_update_is_for_teachers_only(self):
+        self.client.force_login(self.profiles[0].student)
+        response = self.client.post(reverse('update_marks', args=[self.profiles[0].pk]), {'marks': 100})
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.profiles[0].refresh_from_db()
+        self.assertNotEqual(self.profiles[0].marks, 100)
+
+    def test_csv_marks_sheet(self):
+        self.client.force_login(self.teacher)
+        sheet = SimpleUploadedFile('marks.csv', b'enrollment_number,marks,attendance\nE0,72,\nE2,30,4\n')
+        response = self.client.post(reverse('bulk_update_grades'), {'file': sheet})
+        self.assertRedirects(response, reverse('teacher_dash'), fetch_redirect_response=False)
+        self.assertEqual(
+            list(StudentData.objects.order_by('pk').values_list('marks', 'performance', 'attendance')),
+            [(72, 'Good', 0.0), (50, 'Average', 0.0), (30, 'Poor', 4.0)],
+        )
+
+
+@override_settings(PERFORMANCE_BANDS={
+    'default': [(80, 'Excellent'), (60, 'Good'), (40, 'Average')],
+    'CE': [(85, 'Excellent'), (65, 'Good'), (45, 'Average')],
+    'CE:3': [(90, 'Excellent'), (70, 'Good'), (50, 'Average')],
+})
+class PerformanceBandTests(TestCase):
+    def make(self, name, branch, semester, marks):
+        student = User.objects.create_user(name, is_student=True, branch=branch, semester=semester)
+        return StudentData.objects.create(student=student, marks=marks)
+
+    def test_thresholds_per_cohort(self):
+        profiles = [self.make('a', 'CE', 3, 85), self.make('b', 'CE', 5, 85), self.make('c', 'IT', 3, 85)]
+        self.assertEqual([p.performance for p in profiles], ['Good', 'Excellent', 'Excellent'])
+        self.assertEqual(
+            list(StudentData.objects.with_band().order_by('pk').values_list('band', flat=True)),
+            ['Good', 'Excellent', 'Excellent'],
+        )
+
+    def test_recompute_is_set_based(self):
+        for i in range(4):
+            self.make(f'ce{i}', 'CE', 3, 60)
+            self.make(f'it{i}', 'IT', 3, 60)
+        StudentData.objects.update(marks=72)
+        with self.assertNumQueries(3):
+            changed = StudentData.objects.recompute_performance()
+        self.assertEqual(changed, 4)  # only CE:3 moves from Average to Good
+        self.assertFalse(StudentData.objects.with_band().exclude(performance=F('band')).exists())
+
+    def test_moving_cohort_rebands(self):
+        profile = self.make('a', 'IT', 3, 85)
+        profile.student.branch = 'CE'
+        profile.student.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.performance, 'Good')
+
+
+class ExplainPlanTests(TestCase):
+    """
+    Every query the hot views run against a realistically sized database must
+    be answered from an index. On SQLite a plan step ``SCAN <table>`` (no
+    index) fails unless it is a LIMITed walk in primary-key order (a keyset
+    page); on PostgreSQL the queries are re-planned with sequential scans
+    disabled, and a ``Seq Scan`` that survives means no index applies.
+    """
+    STUDENTS = 50_000
+    SMALL_TABLES = {'core_dashboardstat', 'django_session'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', is_teacher=True, is_staff=True)
+        User.objects.bulk_create([
+            User(username=f's{i}', password='!', enrollment_number=f'E{i}', is_student=True,
+                 branch=('CE', 'IT', 'ME')[i % 3], semester=i % 8 + 1)
+            for i in range(cls.STUDENTS)
+        ], batch_size=5000)
+        ids = list(User.objects.filter(is_student=True).values_list('pk', flat=True))
+        StudentData.objects.bulk_create([
+            StudentData(student_id=pk, marks=pk % 101, performance='Poor', face_encoding=b'x' if pk % 10 == 0 else None)
+            for pk in ids
+        ], batch_size=5000)
+        AssignmentSubmission.objects.bulk_create([
+            AssignmentSubmission(student_id=pk, assignment_name='Lab 1', submission_file=f'submissions/{pk}.pdf')
+            for pk in ids[::2]
+        ], batch_size=5000)
+        Material.objects.bulk_create([
+            Material(title=f'Notes {i}', branch=('CE', 'IT', None)[i % 3], semester=i % 8 + 1, teacher=cls.teacher)
+            for i in range(3000)
+        ])
+        LiveSession.objects.bulk_create([LiveSession(meeting_link='https://meet.example/x', is_active=i == 0)
+                                         for i in range(500)])
+        StudentData.objects.recompute_performance()
+        dashboard_stats.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def bare_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                cursor.execute('SET LOCAL enable_seqscan = on')
+                return [table for table in re.findall(r'Seq Scan on (\w+)', plan) if table not in self.SMALL_TABLES]
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            steps = [row[-1] for row in cursor.fetchall()]
+        keyset_walk = ' LIMIT ' in sql and not any('TEMP B-TREE' in step for step in steps)
+        return [
+            step for step in steps
+            if (match := re.fullmatch(r'SCAN (\w+)', step))
+            and match.group(1) not in self.SMALL_TABLES and not keyset_walk
+        ]
+
+    def assertIndexed(self, user, url):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            with self.subTest(url=url, sql=query['sql'][:200]):
+                self.assertEqual(self.bare_scans(query['sql']), [])
+
+    def test_teacher_dash(self):
+        self.assertIndexed(self.teacher, reverse('teacher_dash'))
+        self.assertIndexed(self.teacher, reverse('teacher_dash') + '?branch=CE&semester=3')
+
+    def test_admin_dashboard(self):
+        self.assertIndexed(self.teacher, reverse('admin_dashboard') + '?branch=IT&semester=2')
+
+    def test_view_submissions(self):
+        self.assertIndexed(self.teacher, reverse('view_submissions'))
+        self.assertIndexed(self.teacher, reverse('view_submissions') + '?branch=ME&semester=5')
+
+    def test_student_dash_cold(self):
+        cache.clear()
+        student = User.objects.get(username='s4')
+        self.assertIndexed(student, reverse('student_dash'))
+        self.assertTrue(student_portal.materials_for(student.branch, student.semester))
+
+
+class WriteConcurrencyTests(SimpleTestCase):
+    def test_concurrent_writes(self):
+        # In its own process: the command creates and drops its own scratch database.
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'loadtest_writes', '--workers=4', '--iterations=10', '--students=8'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=300,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        self.assertIn('attendance totals consistent', result.stdout)
+
+
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', is_teacher=True, is_staff=True)
+        cls.student = User.objects.create_user('student', is_student=True, branch='CE', semester=1)
+        StudentData.objects.create(student=cls.student)
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def series(self, name, **labels):
+        return next(row for row in instrumentation.snapshot() if row['name'] == name and row['labels'] == labels)
+
+    def test_request_breakdown_per_view(self):
+        self.client.force_login(self.student)
+        self.client.get(reverse('student_dash'))
+        self.client.get(reverse('student_dash'))
+        self.assertEqual(self.series('request_seconds', view='student_dash')['count'], 2)
+        self.assertGreater(self.series('request_db_queries', view='student_dash')['p99'], 0)
+        self.assertGreater(self.series('request_template_seconds', view='student_dash')['sum'], 0)
+
+    def test_span_and_biometric_stages(self):
+        with instrumentation.span('import'):
+            pass
+        instrumentation.record_stages('verify', {'detect': 12.0, 'match': 1.5})
+        self.assertEqual(self.series('span_seconds', span='import')['count'], 1)
+        self.assertEqual(self.series('biometric_stage_seconds', kind='verify', stage='detect')['p50'], 0.012)
+
+    def test_endpoints_are_staff_only(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(reverse('metrics_dashboard')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics_prometheus')).status_code, 403)
+
+        self.client.force_login(self.teacher)
+        self.client.get(reverse('teacher_dash'))
+        series = self.client.get(reverse('metrics_dashboard')).json()['series']
+        self.assertIn({'view': 'teacher_dash'}, [row['labels'] for row in series])
+        text = self.client.get(reverse('metrics_prometheus')).content.decode()
+        self.assertIn('# TYPE academy_request_seconds summary', text)
+        self.assertIn('academy_request_seconds{view="teacher_dash",quantile="0.95"}', text)
+        self.assertIn('academy_request_seconds_count{view="teacher_dash"} 1', text)
+
+    def test_prometheus_accepts_bearer_token(self):
+        with override_settings(INSTRUMENTATION={**settings.INSTRUMENTATION, 'TOKEN': 'scrape'}):
+            self.assertEqual(self.client.get(reverse('metrics_prometheus')).status_code, 403)
+            response = self.client.get(reverse('metrics_prometheus'), HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+
+    def test_slow_sampled_requests_are_profiled(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        config = {**settings.INSTRUMENTATION, 'PROFILE_SAMPLE_RATE': 1.0, 'PROFILE_DIR': directory}
+        self.client.force_login(self.student)
+        with override_settings(INSTRUMENTATION={**config, 'PROFILE_SLOW_MS': 60_000}):
+            self.client.get(reverse('student_dash'))
+        self.assertEqual(os.listdir(directory), [])
+        with override_settings(INSTRUMENTATION={**config, 'PROFILE_SLOW_MS': 0}):
+            self.client.get(reverse('student_dash'))
+        [name] = os.listdir(directory)
+        self.assertTrue(name.endswith('-student_dash.prof'))
+
+
+class LazyBiometricsTests(SimpleTestCase):
+    """OpenCV and dlib must only load in processes that score faces."""
+    HEAVY = ('cv2', 'face_recognition', 'dlib')
+    # A plain Django process peaks around 60 MB; dlib and its models alone add more than this budget.
+    RSS_BUDGET_MB = 150
+    BOOT_WORKER = (
+        "from django.core.wsgi import get_wsgi_application\n"
+        "get_wsgi_application()\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+    )
+    REPORT = (
+        "import resource, sys\n"
+        f"print(*[name for name in {HEAVY!r} if name in sys.modules])\n"
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)\n"  # KiB on Linux
+    )
+
+    def run_python(self, *args):
+        result = subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings', 'BIOMETRIC_WARM_UP': ''},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        return result
+
+    def assertLean(self, script):
+        heavy, peak_mb = self.run_python('-c', script + self.REPORT).stdout.splitlines()[-2:]
+        self.assertEqual(heavy, '')
+        self.assertLess(int(peak_mb), self.RSS_BUDGET_MB)
+
+    def test_manage_check_skips_biometric_libraries(self):
+        stderr = self.run_python('-X', 'importtime', 'manage.py', 'check').stderr
+        imported = {line.rsplit('|', 1)[-1].strip() for line in stderr.splitlines() if line.startswith('import time:')}
+        self.assertFalse(imported & set(self.HEAVY))
+        self.assertLean("import django\ndjango.setup()\n"
+                        "from django.core.management import call_command\ncall_command('check')\n")
+
+    def test_dashboard_worker_skips_biometric_libraries(self):
+        self.assertLean(self.BOOT_WORKER)
+
+    @skipUnless(importlib.util.find_spec('face_recognition'), "warm_up() needs face_recognition installed")
+    def test_warm_up_loads_the_engine(self):
+        script = self.BOOT_WORKER + (
+            "import sys\n"
+            "from core import biometrics\n"
+            "biometrics.warm_up()\n"
+            "print('cv2' in sys.modules)\n"
+        )
+        self.assertEqual(self.run_python('-c', script).stdout.splitlines()[-1], 'True')
@@ -0,0 +1,185 @@
+"""
+Chunked, resumable uploads for submissions and materials.
+
+The browser announces a file (``start``), then sends fixed-size chunks in
+any order, each with its SHA-256. Chunks are written with ``pwrite`` at
+their offset into a preallocated ``.part`` file under MEDIA_ROOT, so the
+upload never sits in memory or a temp directory. ``complete`` hashes the
+assembled file and renames it to a content-addressed name beside the other
+files of its kind; when that name already exists (the same PDF posted to
+several cohorts) the part is dropped and the existing file is shared.
+"""
+import contextlib
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import UploadChunk, UploadSession
+
+MB = 1024 * 1024
+
+DEFAULTS = {
+    'CHUNK_SIZE': 1 * MB,
+    'MAX_SIZE': {UploadSession.SUBMISSION: 50 * MB, UploadSession.MATERIAL: 500 * MB},
+    'DIRECTORIES': {UploadSession.SUBMISSION: 'submissions', UploadSession.MATERIAL: 'materials/pdfs'},
+    'PARTS_DIR': 'upload_parts',
+    'TTL': 24 * 60 * 60,
+}
+
+
+class UploadError(ValueError):
+    """A request the upload API rejects; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'UPLOADS', {})}
+
+
+def _part_path(session):
+    return os.path.join(settings.MEDIA_ROOT, get_config()['PARTS_DIR'], f'{session.token}.part')
+
+
+def content_name(purpose, digest, filename):
+    """Storage name for a file with SHA-256 ``digest``, e.g. ``submissions/ab/ab12...f.pdf``."""
+    extension = os.path.splitext(filename)[1].lower()[:10]
+    return f"{get_config()['DIRECTORIES'][purpose]}/{digest[:2]}/{digest}{extension}"
+
+
+def check_size(purpose, size):
+    limit = get_config()['MAX_SIZE'][purpose]
+    if size > limit:
+        raise UploadError(f"File is larger than the {limit // MB} MB limit.", status=413)
+
+
+# --- 1. Chunked API ---
+
+def start(user, purpose, filename, size, sha256='', metadata=None):
+    if purpose not in get_config()['DIRECTORIES']:
+        raise UploadError("Unknown upload type.")
+    if size <= 0:
+        raise UploadError("Empty file.")
+    check_size(purpose, size)
+    session = UploadSession.objects.create(
+        token=uuid.uuid4(), user=user, purpose=purpose, filename=os.path.basename(filename)[:255],
+        size=size, chunk_size=get_config()['CHUNK_SIZE'], sha256=(sha256 or '').lower(),
+        metadata=metadata or {},
+    )
+    path = _part_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.truncate(size)  # sparse preallocation; chunks land at their offsets
+    return session
+
+
+def received(session):
+    return sorted(session.chunks.values_list('index', flat=True))
+
+
+def write_chunk(session, index, data, checksum):
+    """Verify and store chunk ``index``; re-sending an identical chunk is a no-op."""
+    if session.completed:
+        raise UploadError("Upload already completed.", status=409)
+    if not 0 <= index < session.chunk_count:
+        raise UploadError("Chunk index out of range.")
+    expected = min(session.chunk_size, session.size - index * session.chunk_size)
+    if len(data) != expected:
+        raise UploadError(f"Chunk {index} must be {expected} bytes.")
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != (checksum or '').lower():
+        raise UploadError(f"Checksum mismatch for chunk {index}.")
+
+    try:
+        fd = os.open(_part_path(session), os.O_WRONLY)
+    except FileNotFoundError:
+        raise UploadError("Upload expired or already completed.", status=409)
+    try:
+        os.pwrite(fd, data, index * session.chunk_size)
+    finally:
+        os.close(fd)
+    try:
+        with transaction.atomic():
+            UploadChunk.objects.create(session=session, index=index, sha256=digest)
+    except IntegrityError:
+        pass  # a retry of a chunk we already have; the bytes are identical
+
+
+def complete(session):
+    """Assemble the upload and return its storage name."""
+    missing = session.chunk_count - session.chunks.count()
+    if missing:
+        raise UploadError(f"{missing} chunks are still missing.", status=409)
+    # Claim the session first (compare-and-set on the row): of two concurrent
+    # completes only one moves the file and goes on to create the record.
+    if not UploadSession.objects.filter(pk=session.pk, completed=False).update(completed=True):
+        raise UploadError("Upload already completed.", status=409)
+    try:
+        name = _assemble(session)
+    except BaseException:
+        UploadSession.objects.filter(pk=session.pk).update(completed=False)
+        raise
+    session.completed = True
+    return name
+
+
+def _assemble(session):
+    path = _part_path(session)
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as fh:
+            while block := fh.read(MB):
+                digest.update(block)
+    except FileNotFoundError:
+        raise UploadError("Upload expired.", status=409)
+    digest = digest.hexdigest()
+    if session.sha256 and session.sha256 != digest:
+        raise UploadError("File checksum does not match.")
+
+    name = content_name(session.purpose, digest, session.filename)
+    final = os.path.join(settings.MEDIA_ROOT, name)
+    if os.path.exists(final):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)  # identical content already stored
+    else:
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(path, final)  # same filesystem: a rename, not a copy
+    return name
+
+
+def purge(ttl=None):
+    """Delete upload sessions (and their part files) older than the TTL."""
+    ttl = ttl if ttl is not None else get_config()['TTL']
+    stale = UploadSession.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=ttl))
+    for session in stale.only('token'):
+        try:
+            os.unlink(_part_path(session))
+        except FileNotFoundError:
+            pass
+    return stale.delete()[0]
+
+
+# --- 2. Plain multipart uploads ---
+
+def store_uploaded_file(uploaded, purpose):
+    """
+    Store a ``request.FILES`` upload under its content-addressed name. Large
+    uploads already sit in a temp file, which the storage moves into place.
+    """
+    check_size(purpose, uploaded.size)
+    digest = hashlib.sha256()
+    for block in uploaded.chunks():
+        digest.update(block)
+    name = content_name(purpose, digest.hexdigest(), uploaded.name)
+    if not default_storage.exists(name):
+        uploaded.seek(0)
+        name = default_storage.save(name, uploaded)
+    return name
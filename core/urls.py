@@ -18,12 +18,24 @@ urlpatterns = [
     
     # --- Academic Features ---
     path('update-marks/<int:student_id>/', views.update_marks, name='update_marks'),
+    path('update-marks/bulk/', views.bulk_update_grades, name='bulk_update_grades'),
     path('submit-hw/', views.submit_assignment, name='submit_assignment'),
     path('view-submissions/', views.view_submissions, name='view_submissions'),
+    path('view-submissions/export/', views.export_submissions, name='export_submissions'),
+    path('uploads/', views.upload_start, name='upload_start'),
+    path('uploads/<uuid:token>/', views.upload_status, name='upload_status'),
+    path('uploads/<uuid:token>/chunks/<int:index>/', views.upload_chunk, name='upload_chunk'),
+    path('uploads/<uuid:token>/complete/', views.upload_complete, name='upload_complete'),
+    path('attendance-report/', views.attendance_report, name='attendance_report'),
     
     # --- AI Biometric Features ---
     path('face-login/', views.face_login, name='face_login'),
     path('register-face/', views.register_face, name='register_face'),
     path('verify-for-class/', views.verify_for_class, name='verify_for_class'),
+    path('biometric-jobs/<int:job_id>/', views.biometric_job_status, name='biometric_job_status'),
     path('reset-face/<int:student_id>/', views.reset_face_id, name='reset_face_id'),
+
+    # --- Instrumentation ---
+    path('system-admin/metrics/', views.metrics_dashboard, name='metrics_dashboard'),
+    path('metrics', views.metrics_prometheus, name='metrics_prometheus'),
 ]
\ No newline at end of file
@@ -1,13 +1,25 @@
-import cv2
-import face_recognition
-import numpy as np
-import pickle
+import asyncio
+import hmac
+import json
+import os
+
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import User, StudentData, Material, AssignmentSubmission, LiveSession
+from django.views.decorators.http import require_safe
+from django.urls import reverse
+from django.utils.text import slugify
+from .models import User, StudentData, Material, AssignmentSubmission, LiveSession, BiometricJob, UploadSession
+from . import (attendance, biometric_jobs, biometrics, dashboard_stats, exports, fragments, grades,
+               instrumentation, media, streaming, student_portal, uploads)
+from .face_index import cohort_key
 from .forms import StudentRegistrationForm
+from .pagination import KeysetPaginator
+
+ROSTER_PAGE_SIZE = 50
 
 # --- 1. AUTHENTICATION & REGISTRATION ---
 
@@ -19,13 +31,9 @@ def login_view(request):
 
         user = None
         if enrollment:
-            try:
-                user_obj = User.objects.get(enrollment_number=enrollment)
-                user = authenticate(username=user_obj.username, password=password)
-            except User.DoesNotExist:
-                messages.error(request, "Invalid Enrollment Number")
+            user = authenticate(request, enrollment=enrollment, password=password)
         elif username:
-            user = authenticate(username=username, password=password)
+            user = authenticate(request, username=username, password=password)
 
         if user is not None:
             login(request, user)
@@ -53,76 +61,46 @@ def register_student(request):
     return render(request, 'core/register.html', {'form': form})
 
 def face_login(request):
-    """AI Login using Face Recognition."""
-    video_capture = cv2.VideoCapture(0)
-    found_user = None
-    registered_students = StudentData.objects.exclude(face_encoding__isnull=True)
-    known_encodings = []
-    student_ids = []
-    
-    for sd in registered_students:
-        known_encodings.append(pickle.loads(sd.face_encoding))
-        student_ids.append(sd.student.id)
-
-    while True:
-        ret, frame = video_capture.read()
-        if not ret: break
-        
-        rgb_frame = frame[:, :, ::-1]
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-
-        for face_encoding in face_encodings:
-            matches = face_recognition.compare_faces(known_encodings, face_encoding, tolerance=0.5)
-            if True in matches:
-                first_match_index = matches.index(True)
-                user_id = student_ids[first_match_index]
-                found_user = User.objects.get(id=user_id)
-                break
-        
-        cv2.imshow('AI Login - Scanning...', frame)
-        if found_user or cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    video_capture.release()
-    cv2.destroyAllWindows()
-
-    if found_user:
-        login(request, found_user)
-        messages.success(request, f"Welcome back, {found_user.username}!")
-        return redirect('student_dash')
-    
-    messages.error(request, "Face not recognized.")
-    return redirect('login')
+    """AI Login: the browser posts frame bursts that are matched against the gallery."""
+    if request.method != "POST":
+        if request.GET.get('failed'):
+            messages.error(request, "Face not recognized.")
+            return redirect('login')
+        return _face_capture_page(request, "AI Login", "Scanning for a registered face", 'face_login', 'login')
+
+    # Optional cohort hint (e.g. a classroom kiosk) narrows the search
+    branch, semester = request.POST.get('branch'), request.POST.get('semester')
+    group = cohort_key(branch, semester) if branch and semester else ''
+    return _submit_biometric_job(request, BiometricJob.IDENTIFY, group=group)
 
 
 # --- 2. DASHBOARDS ---
 
+# The read-heavy dashboards are async: under ASGI (config.asgi) a worker can
+# hold many of them open at once, and their independent lookups are gathered.
+
+async def _auser(request):
+    """The user, loaded without blocking; also set on request.user for templates."""
+    request.user = await request.auser()
+    return request.user
+
 @login_required
-def student_dash(request):
-    """Dashboard with Progress Bar calculation (Cleaned up duplicates)."""
-    # Fetch data safely using .filter().first()
-    data = StudentData.objects.filter(student=request.user).first()
-    materials = Material.objects.all()
-    live_class = LiveSession.objects.filter(is_active=True).first()
-    
-    # Logic for progress bar calculation
-    progress = 25 # Initial progress for account creation
-    if data:
-        if data.face_encoding:
-            progress += 35 # Extra for face registration
-        if data.attendance > 0:
-            progress += 40 # Extra for attending class
-            
-    # Cap at 100%
-    progress = min(progress, 100)
-        
+async def student_dash(request):
+    """Dashboard with Progress Bar calculation, served from the cache when warm."""
+    user = await _auser(request)
+    profile, materials, materials_key, live_class = await asyncio.gather(
+        student_portal.aprofile_for(user.pk),
+        student_portal.amaterials_for(user.branch, user.semester),
+        student_portal.amaterials_key(user.branch, user.semester),
+        student_portal.aactive_live_session(),
+    )
     return render(request, 'core/student_dash.html', {
-        'data': data, 
-        'materials': materials, 
+        'data': profile['data'],
+        'materials': materials,
+        'materials_key': materials_key,
         'live_class': live_class,
-        'progress': progress,
-        'user': request.user
+        'progress': profile['progress'],
+        'user': user
     })
 
 @login_required
@@ -137,31 +115,70 @@ def teacher_dash(request):
             })
             messages.success(request, "Live session link updated!")
         elif 'title' in request.POST:
-            Material.objects.create(
-                title=request.POST.get('title'), 
-                file=request.FILES.get('file'), 
-                video_link=request.POST.get('video_url'), 
-                teacher=request.user
-            )
+            upload = request.FILES.get('file')
+            try:
+                name = uploads.store_uploaded_file(upload, UploadSession.MATERIAL) if upload else None
+            except uploads.UploadError as exc:
+                messages.error(request, str(exc))
+                return redirect('teacher_dash')
+            _create_material(request.user, name, _material_metadata(request))
             messages.success(request, "Material uploaded!")
         return redirect('teacher_dash')
-    return render(request, 'core/teacher_dash.html', {'students': StudentData.objects.all()})
+    students = (
+        StudentData.objects.select_related('student')
+        .only('attendance', 'marks', 'student__username', 'student__enrollment_number')
+        .filter(student__is_student=True, **_cohort_filter(request, 'student__'))
+    )
+    page = KeysetPaginator(students, ('id',), per_page=ROSTER_PAGE_SIZE).page(request.GET)
+    return render(request, 'core/teacher_dash.html', {
+        'students': page, 'roster_version': fragments.roster_version(), **_filter_context(request)
+    })
 
 @login_required
-def admin_dashboard(request):
+async def admin_dashboard(request):
     """Note: Ensure your URL points here for 'admin_dash' name."""
-    if not request.user.is_staff:
+    user = await _auser(request)
+    if not user.is_staff:
         messages.error(request, "Admins Only!")
         return redirect('login')
     
-    context = {
-        'total_students': StudentData.objects.count(),
-        'registered_faces': StudentData.objects.exclude(face_encoding__isnull=True).count(),
-        'active_sessions': LiveSession.objects.filter(is_active=True).count(),
-        'students': StudentData.objects.all()
-    }
+    # The face_encoding blob is never needed here, only whether it is set.
+    students = (
+        StudentData.objects.select_related('student')
+        .only('attendance', 'student__username', 'student__enrollment_number')
+        .annotate(has_face=ExpressionWrapper(Q(face_encoding__isnull=False), output_field=BooleanField()))
+        .filter(student__is_student=True, **_cohort_filter(request, 'student__'))
+    )
+    # Precomputed counters: one query regardless of cohort size.
+    context, page, roster_version = await asyncio.gather(
+        dashboard_stats.asummary(),
+        KeysetPaginator(students, ('id',), per_page=ROSTER_PAGE_SIZE).apage(request.GET),
+        fragments.aroster_version(),
+    )
+    context.update(students=page, roster_version=roster_version, **_filter_context(request))
     return render(request, 'core/admin_dash.html', context)
 
+def _cohort_filter(request, prefix='', source=None):
+    """Branch/semester filter kwargs from the query string; invalid values are ignored."""
+    source = request.GET if source is None else source
+    filters = {}
+    branch = source.get('branch')
+    if branch in dict(User.BRANCH_CHOICES):
+        filters[prefix + 'branch'] = branch
+    semester = source.get('semester', '')
+    if semester.isdigit() and int(semester) in dict(User.SEM_CHOICES):
+        filters[prefix + 'semester'] = int(semester)
+    return filters
+
+def _filter_context(request):
+    selected = _cohort_filter(request)
+    return {
+        'branches': User.BRANCH_CHOICES,
+        'semesters': User.SEM_CHOICES,
+        'selected_branch': selected.get('branch', ''),
+        'selected_semester': selected.get('semester', ''),
+    }
+
 
 # --- 3. AI BIOMETRICS & FLOWS ---
 
@@ -172,36 +189,14 @@ def processing_biometrics(request):
 
 @login_required
 def register_face(request):
-    """Step 2: Biometric Enrollment."""
-    video_capture = cv2.VideoCapture(0)
-    encoding = None
-    while True:
-        ret, frame = video_capture.read()
-        if not ret: break
-        
-        rgb_frame = frame[:, :, ::-1]
-        face_locations = face_recognition.face_locations(rgb_frame)
-        if face_locations:
-            encoding = face_recognition.face_encodings(rgb_frame, face_locations)[0]
-            top, right, bottom, left = face_locations[0]
-            cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-            cv2.putText(frame, "Face Detected! Press 'S' to Save", (left, top-10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-        
-        cv2.imshow("Initial Biometric Enrollment", frame)
-        key = cv2.waitKey(1)
-        if key & 0xFF == ord('s') and encoding is not None:
-            # Update existing data profile
-            student_data, created = StudentData.objects.get_or_create(student=request.user)
-            student_data.face_encoding = pickle.dumps(encoding)
-            student_data.save()
-            messages.success(request, "Biometrics saved! Welcome to the Academy.")
-            break
-        elif key & 0xFF == ord('q'): break
-
-    video_capture.release()
-    cv2.destroyAllWindows()
-    return redirect('student_dash')
+    """Step 2: Biometric Enrollment from a browser-captured burst."""
+    if request.method != "POST":
+        if request.GET.get('failed'):
+            messages.error(request, "No face detected. Please try again in better lighting.")
+            return redirect('student_dash')
+        return _face_capture_page(request, "Face ID Setup", "Initial Biometric Enrollment", 'register_face', 'student_dash')
+
+    return _submit_biometric_job(request, BiometricJob.ENROLL)
 
 @login_required
 def verify_for_class(request):
@@ -211,68 +206,236 @@ def verify_for_class(request):
         messages.error(request, "Face not registered.")
         return redirect('student_dash')
 
-    stored_encoding = pickle.loads(student_data.face_encoding)
-    video_capture = cv2.VideoCapture(0)
-    verified = False
-    
-    for _ in range(80):
-        ret, frame = video_capture.read()
-        if not ret: break
-        
-        rgb_frame = frame[:, :, ::-1]
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-
-        for face_encoding in face_encodings:
-            if True in face_recognition.compare_faces([stored_encoding], face_encoding, tolerance=0.5):
-                verified = True
-                break
-        cv2.imshow('Verifying Identity...', frame)
-        if verified or cv2.waitKey(1) & 0xFF == ord('q'): break
-
-    video_capture.release()
-    cv2.destroyAllWindows()
-
-    if verified:
-        student_data.attendance += 1.0
+    if request.method != "POST":
+        if request.GET.get('failed'):
+            messages.error(request, "Verification Failed.")
+            return redirect('student_dash')
+        return _face_capture_page(request, "Verify Identity", "Verifying Identity...", 'verify_for_class', 'student_dash')
+
+    return _submit_biometric_job(request, BiometricJob.VERIFY, reference=student_data.face_encoding)
+
+def biometric_job_status(request, job_id):
+    """Polled by the capture page until the worker has scored the burst."""
+    job = get_object_or_404(BiometricJob, id=job_id, session_key=request.session.session_key or '')
+    if job.user_id and job.user_id != request.user.id:
+        return JsonResponse({'success': False, 'error': "Unauthorized."}, status=403)
+    if job.status in (BiometricJob.PENDING, BiometricJob.RUNNING):
+        return JsonResponse({'pending': True}, status=202)
+    return _apply_biometric_job(request, job)
+
+def _submit_biometric_job(request, kind, reference=None, group=''):
+    try:
+        with instrumentation.span(f'biometric.{kind}.capture'):
+            frames = biometrics.read_frames(request)
+        job = biometric_jobs.submit(kind, frames, request, reference=reference, group=group)
+    except biometrics.InvalidFrames as exc:
+        return JsonResponse({'success': False, 'error': str(exc)}, status=400)
+    except biometrics.BiometricsBusy:
+        return _biometrics_busy()
+
+    if job.status in (BiometricJob.PENDING, BiometricJob.RUNNING):
+        return JsonResponse({'pending': True, 'poll': reverse('biometric_job_status', args=[job.id])}, status=202)
+    return _apply_biometric_job(request, job)
+
+def _apply_biometric_job(request, job):
+    """Act on a finished job (login / enrolment / attendance) exactly once."""
+    result = job.result or {}
+    timings = result.get('timings', {})
+    if job.status == BiometricJob.FAILED:
+        return JsonResponse({'success': False, 'error': "Could not process the scan."})
+    applied = biometric_jobs.mark_applied(job)
+    if applied:
+        instrumentation.record_stages(job.kind, timings)
+    if not applied or not result.get('success'):
+        return JsonResponse({'success': False, 'timings': timings})
+
+    if job.kind == BiometricJob.IDENTIFY:
+        found_user = User.objects.filter(id=result['student_id']).first()
+        if found_user is None:  # deleted since the gallery was loaded
+            return JsonResponse({'success': False, 'error': "Face not recognised.", 'timings': timings})
+        login(request, found_user)
+        messages.success(request, f"Welcome back, {found_user.username}!")
+        return JsonResponse({'success': True, 'redirect': reverse('student_dash'), 'timings': timings})
+
+    if job.kind == BiometricJob.ENROLL:
+        # Update existing data profile
+        student_data, created = StudentData.objects.get_or_create(student=job.user)
+        student_data.face_encoding = biometric_jobs.result_encoding(job)
         student_data.save()
-        live_class = LiveSession.objects.filter(is_active=True).first()
-        if live_class: return redirect(live_class.meeting_link)
-    
+        messages.success(request, "Biometrics saved! Welcome to the Academy.")
+        return JsonResponse({'success': True, 'redirect': reverse('student_dash'), 'timings': timings})
+
+    live_class = student_portal.active_live_session()
+    attendance.record(job.user, live_class, distance=result.get('distance'))
+    if live_class:
+        return JsonResponse({'success': True, 'redirect': live_class.meeting_link, 'timings': timings})
     messages.error(request, "Verification Failed.")
-    return redirect('student_dash')
+    return JsonResponse({'success': True, 'redirect': reverse('student_dash'), 'timings': timings})
+
+def _face_capture_page(request, title, heading, post_url, cancel_url):
+    config = biometrics.get_config()
+    return render(request, 'core/face_capture.html', {
+        'title': title,
+        'heading': heading,
+        'post_url': reverse(post_url),
+        'cancel_url': reverse(cancel_url),
+        'burst_size': min(4, config['MAX_FRAMES']),
+        'max_attempts': 20,
+        'poll_timeout_ms': config['CLIENT_POLL_TIMEOUT'] * 1000,
+    })
+
+def _biometrics_busy():
+    response = JsonResponse({'success': False, 'error': "Server busy, retrying..."}, status=503)
+    response['Retry-After'] = '1'
+    return response
 
 
 # --- 4. DATA MANAGEMENT ---
 
 @login_required
 def update_marks(request, student_id):
+    if not request.user.is_teacher: return redirect('login')
     if request.method == "POST":
-        sr = get_object_or_404(StudentData, id=student_id)
-        sr.marks = int(request.POST.get('marks', 0))
-        sr.attendance = float(request.POST.get('attendance', 0.0))
-        sr.save()
-        messages.success(request, "Records Updated.")
+        # grades.apply looks the row up itself and reports an unknown student.
+        row = {'id': student_id, 'marks': request.POST.get('marks'), 'attendance': request.POST.get('attendance')}
+        try:
+            grades.apply([(1, row)])
+            messages.success(request, "Records Updated.")
+        except grades.GradeError as exc:
+            messages.error(request, "; ".join(message for _, message in exc.errors))
     return redirect('teacher_dash')
 
+@login_required
+def bulk_update_grades(request):
+    """
+    Apply a batch of marks/attendance in one transaction: a JSON body
+    ``{"rows": [{"id"|"enrollment_number", "marks", "attendance"}], "dry_run": false}``
+    or a CSV marks sheet posted as ``file``. Answers with the diff.
+    """
+    if not request.user.is_teacher:
+        return JsonResponse({'error': "Teachers only."}, status=403)
+    if request.method != "POST":
+        return JsonResponse({'error': "POST required."}, status=405)
+    wants_json = request.content_type == 'application/json' or 'application/json' in request.headers.get('Accept', '')
+    try:
+        if request.content_type == 'application/json':
+            try:
+                payload = json.loads(request.body)
+            except ValueError:
+                return JsonResponse({'error': "Invalid JSON."}, status=400)
+            rows = grades.rows_from_json(payload)
+            dry_run = bool(payload.get('dry_run')) if isinstance(payload, dict) else False
+        elif 'file' in request.FILES:
+            rows = grades.rows_from_csv(request.FILES['file'])
+            dry_run = bool(request.POST.get('dry_run'))
+        else:
+            return JsonResponse({'error': "Send JSON rows or a CSV file."}, status=400)
+        result = grades.apply(rows, dry_run=dry_run)
+    except grades.GradeError as exc:
+        if not wants_json:
+            messages.error(request, "Marks sheet rejected: " + "; ".join(f"row {n}: {m}" for n, m in exc.errors[:10]))
+            return redirect('teacher_dash')
+        return JsonResponse({'errors': [{'row': n, 'error': m} for n, m in exc.errors]}, status=400)
+    if not wants_json:
+        messages.success(request, f"Updated {result['updated']} students ({result['unchanged']} unchanged).")
+        return redirect('teacher_dash')
+    return JsonResponse({'dry_run': dry_run, **result})
+
 @login_required
 def submit_assignment(request):
     if request.method == "POST":
-        AssignmentSubmission.objects.create(
-            student=request.user, 
-            assignment_name=request.POST.get('assignment_name'), 
-            submission_file=request.FILES.get('assignment_file')
-        )
+        upload = request.FILES.get('assignment_file')
+        if upload is None:
+            messages.error(request, "Choose a file to submit.")
+            return redirect('submit_assignment')
+        try:
+            name = uploads.store_uploaded_file(upload, UploadSession.SUBMISSION)
+        except uploads.UploadError as exc:
+            messages.error(request, str(exc))
+            return redirect('submit_assignment')
+        _create_submission(request.user, name, {'assignment_name': request.POST.get('assignment_name')})
         messages.success(request, "Submitted!")
         return redirect('student_dash')
-    return render(request, 'core/submit_hw.html')
+    return render(request, 'core/submit_hw.html', {'chunk_upload': UploadSession.SUBMISSION})
+
+def _create_submission(user, name, metadata):
+    return AssignmentSubmission.objects.create(
+        student=user, 
+        assignment_name=metadata.get('assignment_name'), 
+        submission_file=name
+    )
+
+def _material_metadata(request):
+    cohort = _cohort_filter(request, source=request.POST)
+    return {
+        'title': request.POST.get('title'),
+        'video_link': request.POST.get('video_url'),
+        'branch': cohort.get('branch'),
+        'semester': cohort.get('semester', 1),
+    }
+
+def _create_material(user, name, metadata):
+    return Material.objects.create(
+        title=metadata.get('title'), 
+        file=name, 
+        video_link=metadata.get('video_link'), 
+        teacher=user,
+        branch=metadata.get('branch'),
+        semester=metadata.get('semester', 1),
+    )
 
 @login_required
-def view_submissions(request):
+async def view_submissions(request):
     """View for teachers to see student uploads."""
+    if not (await _auser(request)).is_teacher: return redirect('login')
+    submissions = (
+        AssignmentSubmission.objects.select_related('student')
+        .only('assignment_name', 'submission_file', 'submitted_at', 'student__username')
+        .filter(student__is_student=True, **_cohort_filter(request, 'student__'))
+    )
+    page = await KeysetPaginator(submissions, ('-submitted_at', '-id'), per_page=ROSTER_PAGE_SIZE).apage(request.GET)
+    return render(request, 'core/view_submissions.html', {'submissions': page, **_filter_context(request)})
+
+@login_required
+def export_submissions(request):
+    """All matching submissions as one ZIP (with a CSV manifest), streamed as it is built."""
+    if not request.user.is_teacher: return redirect('login')
+    filters = {'student__is_student': True, **_cohort_filter(request, 'student__')}
+    assignment = request.GET.get('assignment', '').strip()
+    if assignment:
+        filters['assignment_name'] = assignment
+    submissions = (
+        AssignmentSubmission.objects.select_related('student')
+        .only('assignment_name', 'submission_file', 'submitted_at',
+              'student__username', 'student__first_name', 'student__last_name', 'student__enrollment_number')
+        .filter(**filters)
+        .order_by('student__enrollment_number', 'submitted_at')
+    )
+    label = '-'.join(str(part) for part in [assignment, *_cohort_filter(request).values()] if part) or 'all'
+    response = StreamingHttpResponse(exports.stream_submissions_zip(submissions), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="submissions-{slugify(label)}.zip"'
+    return streaming.for_request(request, response)
+
+@login_required
+def attendance_report(request):
+    """Per-session attendance, and one student's record when ?enrollment= is given."""
     if not request.user.is_teacher: return redirect('login')
-    submissions = AssignmentSubmission.objects.all().order_by('-submitted_at')
-    return render(request, 'core/view_submissions.html', {'submissions': submissions})
+    enrolled = StudentData.objects.filter(is_active=True).count()
+    sessions = KeysetPaginator(
+        attendance.with_attended(LiveSession.objects.all()), ('-created_at', '-id'), per_page=ROSTER_PAGE_SIZE,
+    ).page(request.GET)
+    sessions.object_list = [attendance.session_row(session, session.attended, enrolled) for session in sessions]
+    student, student_rows = None, []
+    enrollment = request.GET.get('enrollment')
+    if enrollment:
+        student = User.objects.filter(enrollment_number=enrollment, is_student=True).first()
+        if student is None:
+            messages.error(request, "No student with that enrollment number.")
+        else:
+            student_rows = attendance.student_report(student)
+    return render(request, 'core/attendance_report.html', {
+        'sessions': sessions, 'student': student, 'student_rows': student_rows, 'enrollment': enrollment or '',
+    })
 
 @login_required
 def reset_face_id(request, student_id):
@@ -284,4 +447,112 @@ def reset_face_id(request, student_id):
     student_record.face_encoding = None
     student_record.save()
     messages.success(request, f"Biometric data for {student_record.student.username} reset.")
-    return redirect('admin_dashboard')
\ No newline at end of file
+    return redirect('admin_dashboard')
+
+
+# --- 5. CHUNKED UPLOADS (see core.uploads) ---
+
+def _may_upload(user, purpose):
+    if purpose == UploadSession.SUBMISSION:
+        return user.is_student
+    if purpose == UploadSession.MATERIAL:
+        return user.is_teacher
+    return False
+
+@login_required
+def upload_start(request):
+    """Announce a file: POST purpose, filename, size, optional sha256 and the form fields."""
+    if request.method != "POST":
+        return JsonResponse({'error': "POST required."}, status=405)
+    purpose = request.POST.get('purpose')
+    if not _may_upload(request.user, purpose):
+        return JsonResponse({'error': "Not allowed."}, status=403)
+    if purpose == UploadSession.SUBMISSION:
+        metadata = {'assignment_name': request.POST.get('assignment_name')}
+    else:
+        metadata = _material_metadata(request)
+    try:
+        session = uploads.start(
+            request.user, purpose, request.POST.get('filename', ''), int(request.POST.get('size', 0)),
+            sha256=request.POST.get('sha256', ''), metadata=metadata,
+        )
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=getattr(exc, 'status', 400))
+    return JsonResponse(_upload_state(session), status=201)
+
+def _upload_state(session):
+    return {
+        'token': str(session.token),
+        'chunk_size': session.chunk_size,
+        'chunks': session.chunk_count,
+        'received': uploads.received(session),
+        'completed': session.completed,
+    }
+
+@login_required
+def upload_status(request, token):
+    """Which chunks the server already has, so an interrupted upload can resume."""
+    session = get_object_or_404(UploadSession, token=token, user=request.user)
+    return JsonResponse(_upload_state(session))
+
+@login_required
+def upload_chunk(request, token, index):
+    """PUT one chunk as the raw body with its SHA-256 in X-Chunk-SHA256."""
+    if request.method not in ("PUT", "POST"):
+        return JsonResponse({'error': "PUT required."}, status=405)
+    session = get_object_or_404(UploadSession, token=token, user=request.user)
+    try:
+        uploads.write_chunk(session, index, request.body, request.headers.get('X-Chunk-SHA256'))
+    except uploads.UploadError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+    return JsonResponse({'index': index})
+
+@login_required
+def upload_complete(request, token):
+    if request.method != "POST":
+        return JsonResponse({'error': "POST required."}, status=405)
+    session = get_object_or_404(UploadSession, token=token, user=request.user)
+    try:
+        name = uploads.complete(session)
+    except uploads.UploadError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+    if session.purpose == UploadSession.SUBMISSION:
+        _create_submission(request.user, name, session.metadata)
+        messages.success(request, "Submitted!")
+        return JsonResponse({'success': True, 'redirect': reverse('student_dash')})
+    _create_material(request.user, name, session.metadata)
+    messages.success(request, "Material uploaded!")
+    return JsonResponse({'success': True, 'redirect': reverse('teacher_dash')})
+
+
+# --- 6. MEDIA ---
+
+@require_safe
+@login_required
+def serve_media(request, name):
+    """Uploaded files, checked against the user and streamed by core.media."""
+    if not media.can_access(request.user, name):
+        raise Http404("File not found.")
+    response = media.serve(request, name, as_attachment=name.startswith('submissions/'))
+    return streaming.for_request(request, response)
+
+
+# --- 7. INSTRUMENTATION ---
+
+def _may_read_metrics(request):
+    token = instrumentation.get_config()['TOKEN']
+    offered = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    return request.user.is_staff or bool(token) and hmac.compare_digest(offered, token)
+
+@require_safe
+def metrics_dashboard(request):
+    """Per-view and per-span p50/p95/p99 of this worker process, for staff."""
+    if not _may_read_metrics(request):
+        return JsonResponse({'error': "Staff only."}, status=403)
+    return JsonResponse({'pid': os.getpid(), 'series': instrumentation.snapshot()})
+
+@require_safe
+def metrics_prometheus(request):
+    if not _may_read_metrics(request):
+        return HttpResponse("Staff only.\n", status=403, content_type='text/plain')
+    return HttpResponse(instrumentation.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
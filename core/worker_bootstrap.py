@@ -0,0 +1,23 @@
+"""
+Initializers for worker processes (biometric pool, password hashing pool).
+
+Kept free of Django model imports so a freshly spawned process can import it
+before the app registry is ready.
+"""
+import os
+
+
+def init_django():
+    """ProcessPoolExecutor initializer: configure settings and the app registry."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def init_worker():
+    """Biometric pool initializer: set up Django and load models once."""
+    init_django()
+    from core import biometrics
+
+    biometrics.warm_up()